@@ -0,0 +1,417 @@
+'''
+This file holds the batched stepping engine for the VacuumEnvironment.
+
+The BatchEngine keeps agent positions and headings, blocking walls, dirt occupancy and the locations of every object on
+the grid in NumPy arrays, computes the GPS, Compass, Dirty, Bump and Range percepts of all agents at once, and applies
+MoveForward, TurnLeft, TurnRight, GrabObject and ReleaseObject actions in bulk.  Agent programs, communicators and state
+estimators are run unchanged by Environment.step, which hands the percept and action phases to the engine: percepts
+are handed to the programs as the same dicts the perceptors build, and the engine writes the new locations and headings
+back to the agents every tick.
+
+Given a seed, a run with the engine is identical to a run with Environment.step: the random numbers are drawn in the
+same order, and moves into cells that another agent is entering or leaving in the same tick are resolved in agent
+order, just as the actuators do one at a time.
+'''
+
+import random
+import warnings
+import numpy as np
+
+from objects import Dirt
+from agents import Agent
+from perception import GPSPerceptor, CompassPerceptor, DirtyPerceptor, BumpPerceptor, RangePerceptor
+from actuator import MoveForward, TurnLeft, TurnRight, GrabObject, ReleaseObject
+
+HEADINGS = [(1, 0), (0, 1), (-1, 0), (0, -1)]  # same order as actuator.turn_heading, TurnLeft is +1
+HEADING_VECTORS = np.array(HEADINGS)
+
+# actions the engine applies itself, and the actuator type that must be behind each of them
+MOVE, LEFT, RIGHT, GRAB, RELEASE = range(5)
+# the kinds of rows that are counted in the cells of the dirt and walls grids
+DIRT, WALL = 1, 2
+BATCH_ACTIONS = {'MoveForward': (MOVE, MoveForward), 'TurnLeft': (LEFT, TurnLeft), 'TurnRight': (RIGHT, TurnRight),
+                 'GrabObject': (GRAB, GrabObject), 'ReleaseObject': (RELEASE, ReleaseObject)}
+
+
+_disk_offsets = {}
+
+def disk_offsets(r):
+    '''Return the (dx, dy) offsets of the cells within distance r of a cell, as an array, with the same test as the
+    RangePerceptor.'''
+    if r not in _disk_offsets:
+        k = int(np.floor(r))
+        (dx, dy) = np.meshgrid(np.arange(-k, k + 1), np.arange(-k, k + 1), indexing='ij')
+        if r == np.round(r):
+            near = dx * dx + dy * dy <= r * r    # exact for integer radii
+        else:
+            near = np.hypot(dx, dy) <= r
+        _disk_offsets[r] = np.stack([dx[near], dy[near]], axis=1)
+    return _disk_offsets[r]
+
+
+class BatchEngine():
+    '''
+    Steps an Environment with array-based percepts and actions.  The engine opens a journal on the environment's
+    spatial index, and the objects that anything other than the engine added, removed or moved (exogenous_change,
+    changes made between runs, ...) are mirrored in the arrays one by one, so the environment can still be used
+    normally between steps.  The arrays are only rebuilt from scratch when the journal was truncated or lost (the
+    index was replaced), when agents were added or removed, when the grid has to grow, or to drop the rows of removed
+    objects once they are half of the rows.  Actuator params (e.g. 'probability') are read when the arrays are rebuilt.
+    '''
+
+    def __init__(self, env):
+        self.env = env
+        self.agents = []
+        self.stale = True       # set when the arrays must be rebuilt before they can be used
+
+    # __________________________________________________________________________
+    # Array state
+
+    def sync(self):
+        '''Bring the arrays in line with the changes made to the environment since the engine last touched it.'''
+        journal = self.env.index.take_journal(self)
+        if self.stale or journal is None or len(self.agents) != len(self.env.agents) or not self.apply(journal):
+            self.rebuild()
+        # headings are not tracked by the index, so always take them from the agents
+        for (i, agent) in enumerate(self.agents):
+            self.heading[i] = HEADINGS.index(agent.heading)
+
+    def apply(self, journal):
+        '''Mirror the objects in journal in the arrays.  Returns False if the arrays have to be rebuilt instead.'''
+        index = self.env.index
+        added = []
+        for obj in journal:
+            row = self.row_of.get(obj)
+            if isinstance(obj, Agent):
+                i = self.agent_index.get(obj)
+                if i is None or obj not in index or not isinstance(obj.location, tuple) or not self.on_grid(obj):
+                    return False
+                self.pos[i] = obj.location      # an agent moved by something other than the engine
+                self.obj_xy[row] = obj.location
+                self.obj_locs[row] = obj.location
+            elif row is None:
+                if obj in index and isinstance(obj.location, tuple):
+                    added.append(obj)
+            elif obj in index and index.seq_of(obj) != self.obj_seq[row]:
+                return False                    # filed again at another place in the .objects order
+            else:
+                self.update_row(obj)
+        if added:
+            added.sort(key=index.seq_of)
+            if (self.obj_seq and index.seq_of(added[0]) < self.obj_seq[-1]) or not all(self.on_grid(o) for o in added):
+                return False
+            self.add_rows(added)
+        return not self.stale and self.removed_rows * 2 <= len(self.objs)
+
+    def on_grid(self, obj):
+        '''Return True if obj is at an integer location inside the grids, away from their margin.'''
+        (x, y) = obj.location
+        if not (isinstance(x, (int, np.integer)) and isinstance(y, (int, np.integer))):
+            return False
+        (x, y) = (x - self.origin[0], y - self.origin[1])
+        return 0 < x < self.walls.shape[0] - 1 and 0 < y < self.walls.shape[1] - 1
+
+    def rebuild(self):
+        env = self.env
+        self.agents = list(env.agents)
+        self.agent_index = {a: i for (i, a) in enumerate(self.agents)}
+        objs = [o for o in env.objects if isinstance(o.location, tuple)]
+        for o in objs:
+            if not all(isinstance(c, (int, np.integer)) for c in o.location):
+                raise ValueError('The batch engine needs integer locations, %s is at %s' % (o, o.location))
+
+        # grids cover every object plus a margin of one cell, so that the cell ahead of any agent is on the grid
+        xs = [o.location[0] for o in objs] or [0]
+        ys = [o.location[1] for o in objs] or [0]
+        self.origin = np.array([min(min(xs), 0) - 1, min(min(ys), 0) - 1])
+        shape = (max(max(xs) + 1, env.width) + 2 - self.origin[0], max(max(ys) + 1, env.height) + 2 - self.origin[1])
+
+        self.walls = np.zeros(shape, dtype=bool)       # blockers that are not agents
+        self.wall_count = np.zeros(shape, dtype=int)   # number of such blockers in each cell
+        self.dirt = np.zeros(shape, dtype=int)         # number of Dirt objects in each cell
+
+        # every object on the grid, in the order of env.objects, for the Range percept
+        self.range_perceptor = env.perceptors.get('RangePerceptor', RangePerceptor(env))
+        self.objs = []
+        self.row_of = {}
+        self.obj_seq = []
+        self.obj_kind = []
+        self.obj_xy = np.zeros((0, 2), dtype=int)
+        self.obj_locs = []
+        self.obj_names = []
+        self.present = np.zeros(0, dtype=bool)
+        self.removed_rows = 0
+        self.add_rows(objs)
+
+        n = len(self.agents)
+        self.pos = np.array([a.location for a in self.agents], dtype=int).reshape(-1, 2)
+        self.heading = np.zeros(n, dtype=int)
+        self.blocker = np.array([bool(a.blocker) for a in self.agents], dtype=bool)
+        self.agent_rows = np.array([self.row_of[a] for a in self.agents], dtype=int)
+        self.sensor_r = np.array([getattr(a, 'sensor_r', RangePerceptor.default_r) for a in self.agents], dtype=float)
+
+        # per agent: which actions it can take, and with what probability
+        self.probability = np.ones((n, len(BATCH_ACTIONS)))
+        self.supported = []
+        for (i, a) in enumerate(self.agents):
+            supported = {name for (name, actuator) in env.actuators.items()
+                         if [c for c in a.actuator_types if type(actuator) is c.type]}
+            self.supported.append(supported)
+            for (name, (code, actuator_type)) in BATCH_ACTIONS.items():
+                params = {}
+                for ps in [c.params for c in a.actuator_types if c.type.__name__ == name]:
+                    params.update(ps)
+                self.probability[i, code] = params.get('probability', 1)
+
+        # past half the objects, on top of the agents the engine moves itself, a rebuild is cheaper than the changes
+        env.index.open_journal(self, limit=len(objs) // 2 + n)
+        self.stale = False
+
+    def add_rows(self, objs):
+        '''Give each of objs, which are on the grid and come after every row in the .objects order, a row.'''
+        index = self.env.index
+        for o in objs:
+            self.row_of[o] = len(self.objs)
+            self.objs.append(o)
+            self.obj_seq.append(index.seq_of(o))
+            self.obj_kind.append(DIRT if isinstance(o, Dirt) else WALL if o.blocker and not isinstance(o, Agent) else 0)
+            self.obj_locs.append(o.location)
+            self.obj_names.append(self.range_perceptor.name_of_object(o))
+        start = len(self.present)
+        self.obj_xy = np.concatenate([self.obj_xy, np.array([o.location for o in objs], dtype=int).reshape(-1, 2)])
+        self.present = np.concatenate([self.present, np.ones(len(objs), dtype=bool)])
+        for row in range(start, len(self.objs)):
+            self.file_row(row, 1)
+
+    def cells(self, xy):
+        '''Return grid indices for an array of (x, y) locations.'''
+        return (xy[..., 0] - self.origin[0], xy[..., 1] - self.origin[1])
+
+    def occupancy(self):
+        '''Return the number of blocking agents in each cell.'''
+        occ = np.zeros(self.walls.shape, dtype=int)
+        np.add.at(occ, self.cells(self.pos[self.blocker]), 1)
+        return occ
+
+    # __________________________________________________________________________
+    # Percepts
+
+    def percept_all(self):
+        if self.env.profiler:
+            self.env.profiler.time('percept.batch', self._percept_all)
+        else:
+            self._percept_all()
+
+    def _percept_all(self):
+        self.sync()
+        env = self.env
+        kinds = set()
+        for a in self.agents:
+            kinds.update(a.perceptor_types)
+
+        gps = [tuple(p) for p in self.pos.tolist()]
+        compass = [HEADINGS[h] for h in self.heading.tolist()]
+        dirty = (self.dirt[self.cells(self.pos)] > 0).tolist() if DirtyPerceptor in kinds else None
+        if BumpPerceptor in kinds:
+            ahead = self.cells(self.pos + HEADING_VECTORS[self.heading])
+            bump = (self.walls[ahead] | (self.occupancy()[ahead] > 0)).tolist()
+        objects = self.range_percepts([RangePerceptor in a.perceptor_types for a in self.agents]) \
+            if RangePerceptor in kinds else None
+
+        for (i, agent) in enumerate(self.agents):
+            agentpercept = {}
+            for per in agent.perceptor_types:
+                if per is GPSPerceptor:
+                    agentpercept['GPS'] = gps[i]
+                elif per is CompassPerceptor:
+                    agentpercept['Compass'] = compass[i]
+                elif per is DirtyPerceptor:
+                    agentpercept['Dirty'] = dirty[i]
+                elif per is BumpPerceptor:
+                    agentpercept['Bump'] = bump[i]
+                elif per is RangePerceptor:
+                    agentpercept['Objects'] = objects[i]
+                else:
+                    agentpercept.update(env.perceptors[per.__name__].percept(agent))
+            agent.percepts = agentpercept
+
+    def range_percepts(self, wanted):
+        '''
+        Return the Range percept ('Objects' list) for every agent that has a RangePerceptor, None for the rest.  The
+        rows of the objects on the grid are sorted by cell, so the objects in range of an agent are found by looking
+        up the cells within its range, rather than measuring the distance to every object.
+        '''
+        wanted = np.flatnonzero(wanted)
+        objects = [None] * len(self.agents)
+        rows = np.flatnonzero(self.present)
+        (cx, cy) = self.cells(self.obj_xy[rows])
+        height = self.walls.shape[1]
+        cell_ids = cx * height + cy
+        order = np.argsort(cell_ids, kind='stable')
+        (rows, cell_ids) = (rows[order], cell_ids[order])
+
+        names, locs = self.obj_names, self.obj_locs
+        for r in np.unique(self.sensor_r[wanted]).tolist():
+            group = wanted[self.sensor_r[wanted] == r]
+            (lo, hi) = self.cells(self.pos[group][:, None, :] + disk_offsets(r)[None, :, :])
+            inside = (lo >= 0) & (lo < self.walls.shape[0]) & (hi >= 0) & (hi < height)
+            query = np.where(inside, lo * height + hi, -1)
+            start = np.searchsorted(cell_ids, query, 'left').ravel()
+            counts = np.searchsorted(cell_ids, query, 'right').ravel() - start
+            # the rows in the cells of each agent, sorted by agent and then by row, so in the order of env.objects
+            owner = np.repeat(np.repeat(np.arange(len(group)), query.shape[1]), counts)
+            offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            key = np.sort(owner * len(self.objs) + rows[np.repeat(start, counts) + offset])
+            bounds = np.searchsorted(key, np.arange(len(group) + 1) * len(self.objs)).tolist()
+            found = (key % len(self.objs)).tolist()
+            for (k, i) in enumerate(group.tolist()):
+                objects[i] = [(names[j], locs[j]) for j in found[bounds[k]:bounds[k + 1]]]
+        return objects
+
+    # __________________________________________________________________________
+    # Actions
+
+    def execute_actions(self, actions):
+        if self.env.profiler:
+            self.env.profiler.time('execute_action.batch', self._execute_actions, actions)
+        else:
+            self._execute_actions(actions)
+
+    def _execute_actions(self, actions):
+        env = self.env
+        if any(action not in BATCH_ACTIONS or type(env.actuators[action]) is not BATCH_ACTIONS[action][1]
+               for (supported, action) in zip(self.supported, actions) if action in supported):
+            # something the engine can't apply itself: fall back to the actuators for this tick
+            for (agent, action) in zip(self.agents, actions):
+                env.execute_action(agent, action)
+            self.stale = True
+            return
+
+        n = len(self.agents)
+        codes = np.full(n, -1)
+        for (i, (agent, action)) in enumerate(zip(self.agents, actions)):
+            if action in self.supported[i]:
+                codes[i] = BATCH_ACTIONS[action][0]
+            elif action in env.actuators:
+                # if the agent is trying to do something it can't, raise a warning
+                warnings.warn('%s requested action %s and it is not supported.' % (agent, action))
+            else:
+                raise KeyError(action)
+
+        # one draw per supported action, in agent order, as the actuators do
+        acting = np.flatnonzero(codes >= 0)
+        draws = np.ones(n)
+        draws[acting] = [random.random() for i in acting]
+        succeeded = np.zeros(n, dtype=bool)
+        succeeded[acting] = draws[acting] <= self.probability[acting, codes[acting]]
+
+        self.turn(succeeded & (codes == LEFT), +1)
+        self.turn(succeeded & (codes == RIGHT), -1)
+        self.move_forward(np.flatnonzero(succeeded & (codes == MOVE)))
+        self.grab_and_release(np.flatnonzero(succeeded & ((codes == GRAB) | (codes == RELEASE))), codes)
+
+        env.index.take_journal(self)   # the engine's own changes are already in the arrays
+
+    def turn(self, mask, inc):
+        idx = np.flatnonzero(mask)
+        if len(idx):
+            self.heading[idx] = (self.heading[idx] + inc) % len(HEADINGS)
+            for i in idx.tolist():
+                self.agents[i].heading = HEADINGS[self.heading[i]]
+
+    def move_forward(self, movers):
+        '''
+        Move every agent in movers one cell forward unless a blocker is in the way.  Walls are checked for everyone at
+        once.  A move is only order dependent if its destination starts out holding a blocking agent or is the
+        destination of another blocking mover; those contested moves are replayed one at a time in agent order,
+        together with the uncontested blocking moves into or out of the contested cells.
+        '''
+        if not len(movers):
+            return
+        dest = self.pos[movers] + HEADING_VECTORS[self.heading[movers]]
+        open_cell = ~self.walls[self.cells(dest)]
+        movers, dest = movers[open_cell], dest[open_cell]
+        if not len(movers):
+            return
+
+        occ = self.occupancy()
+        arriving = np.zeros(self.walls.shape, dtype=int)
+        blocking_movers = self.blocker[movers]
+        np.add.at(arriving, self.cells(dest[blocking_movers]), 1)
+        dest_cells = self.cells(dest)
+        contested = (occ[dest_cells] > 0) | (arriving[dest_cells] - blocking_movers > 0)
+
+        success = ~contested
+        if contested.any():
+            contested_cells = np.zeros(self.walls.shape, dtype=bool)
+            contested_cells[self.cells(dest[contested])] = True
+            origin = self.pos[movers]
+            touches_contested = contested_cells[self.cells(origin)] | contested_cells[dest_cells]
+            relevant = contested | (blocking_movers & touches_contested)
+            for k in np.flatnonzero(relevant).tolist():
+                d = (dest[k, 0] - self.origin[0], dest[k, 1] - self.origin[1])
+                if contested[k]:
+                    if occ[d] > 0:
+                        continue
+                    success[k] = True
+                if blocking_movers[k]:
+                    occ[origin[k, 0] - self.origin[0], origin[k, 1] - self.origin[1]] -= 1
+                    occ[d] += 1
+
+        movers, dest = movers[success], dest[success]
+        self.pos[movers] = dest
+        self.obj_xy[self.agent_rows[movers]] = dest
+        for (i, loc) in zip(movers.tolist(), [tuple(d) for d in dest.tolist()]):
+            self.env.index.move(self.agents[i], loc)
+            self.obj_locs[self.agent_rows[i]] = loc
+
+        # an agent at the edge of the grids could step off them next tick
+        lo = self.pos - self.origin
+        if (lo <= 0).any() or (lo >= np.array(self.walls.shape) - 1).any():
+            self.stale = True
+
+    def grab_and_release(self, actors, codes):
+        '''Grabs and releases can hand the same dirt between agents, so they are applied one at a time in agent
+        order.'''
+        env = self.env
+        for i in actors.tolist():
+            agent = self.agents[i]
+            if codes[i] == GRAB:
+                for o in env.actuators['GrabObject'].grab(agent):
+                    self.update_row(o)
+            else:
+                o = env.actuators['ReleaseObject'].release(agent)
+                if o is not None:
+                    self.update_row(o)
+
+    def update_row(self, obj):
+        '''Mirror an object being picked up, put down, moved or removed in the arrays.'''
+        row = self.row_of.get(obj)
+        if row is None:
+            self.stale = True   # an object the engine hasn't seen: rebuild next tick
+            return
+        if obj not in self.env.index:
+            self.removed_rows += 1
+            del self.row_of[obj]
+        if self.present[row]:
+            self.file_row(row, -1)
+        self.present[row] = obj in self.row_of and isinstance(obj.location, tuple)
+        if self.present[row]:
+            if not self.on_grid(obj):
+                self.present[row] = False
+                self.stale = True
+                return
+            self.obj_xy[row] = obj.location
+            self.obj_locs[row] = obj.location
+            self.file_row(row, 1)
+
+    def file_row(self, row, n):
+        '''Add n to the count of the row's kind (dirt or walls) in the cell of the row.'''
+        kind = self.obj_kind[row]
+        if kind:
+            cell = (self.obj_xy[row, 0] - self.origin[0], self.obj_xy[row, 1] - self.origin[1])
+            if kind == DIRT:
+                self.dirt[cell] += n
+            else:
+                self.wall_count[cell] += n
+                self.walls[cell] = self.wall_count[cell] > 0
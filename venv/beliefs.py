@@ -0,0 +1,130 @@
+'''
+This file holds the belief map that a Communicator keeps for the teams of agents in an environment.
+
+'''
+
+import bisect
+
+
+class BeliefMap():
+    '''
+    A BeliefMap holds what each team of communicating agents currently knows about the world: every (name, location)
+    entry that at least one member of the team is observing.  A team is a connected component of the communication
+    network, as given to regroup() every tick.
+
+    Agents don't send each other their percepts.  Each one publishes what it observes, and the map only takes in the
+    entries added or removed since that agent last published, found with set differences, so that the work done for
+    an agent is in proportion to what changed.  For each team the map keeps the number of members observing each
+    entry, the tick since which the team has observed it continuously, and its entries in sorted order.  The sorted
+    view is updated in place, and only where an entry's count goes from 0 to 1 or from 1 to 0.
+    Every member of a team is handed a message, a dict holding:
+        Objects:  the team's entries in sorted order.
+        Since:    entry -> the tick since which the team has observed it continuously.
+        Added:    the entries the team gained since the agent's last message, in sorted order.
+        Removed:  the entries the team lost since the agent's last message, in sorted order.
+        Plan:     a dict the team's programs can keep their shared state in across ticks (such as the k-means means
+                  of clustering.plan_team).  A new team starts with an empty one.
+    Objects and Since belong to the map and are shared by the whole team, so they must not be changed.  The members
+    of a team that is unchanged since the last tick share one message; an agent whose team changed gets Added and
+    Removed worked out against the team it was in before.
+    '''
+
+    def __init__(self):
+        self.observed = {}      # agent -> set of the entries the agent last published
+        self.team_of = {}       # agent -> frozenset of the agents in its team
+        self.counts = {}        # team -> {entry: number of members observing it}
+        self.since = {}         # team -> {entry: tick since which the team has observed it continuously}
+        self.views = {}         # team -> sorted list of its entries
+        self.plans = {}         # team -> dict of state kept by the team's programs
+        self.added = {}         # team -> {entry: None} gained this tick
+        self.removed = {}       # team -> {entry: None} lost this tick
+        self.previous = {}      # agent -> set of the entries of its old team, for agents whose team changed
+        self.messages = {}      # team -> the message handed to its members this tick
+
+    def regroup(self, components):
+        '''Set the teams to the given groups of agents.  Teams that are unchanged since the last tick keep their counts;
+        new teams take the counts and timestamps of what their members observe from the teams they were in.'''
+        teams = [frozenset(members) for members in components]
+        team_of = {a: team for team in teams for a in team}
+
+        self.previous = {}
+        old_views = {}
+        for team in teams:
+            if team in self.counts:
+                continue
+            counts = {}
+            since = {}
+            for a in team:
+                old = self.team_of.get(a)
+                for entry in self.observed.get(a, ()):
+                    counts[entry] = counts.get(entry, 0) + 1
+                    t = self.since[old][entry]
+                    if since.get(entry, t) >= t:
+                        since[entry] = t
+                if old not in old_views:
+                    old_views[old] = set(self.views.get(old, ()))
+                self.previous[a] = old_views[old]
+            self.counts[team] = counts
+            self.since[team] = since
+            self.views[team] = sorted(counts)
+            self.plans[team] = {}
+
+        current = set(teams)
+        for team in [team for team in self.counts if team not in current]:
+            for table in (self.counts, self.since, self.views, self.plans, self.added, self.removed):
+                table.pop(team, None)
+        for a in [a for a in self.observed if a not in team_of]:
+            del self.observed[a]
+        for team in teams:
+            self.added[team] = {}
+            self.removed[team] = {}
+        self.messages = {}
+        self.team_of = team_of
+
+    def publish(self, agent, entries, t):
+        '''Bring the entries agent is observing in line with entries, as of tick t.'''
+        new = set(entries)
+        old = self.observed.get(agent, set())
+        team = self.team_of[agent]
+        for entry in new.difference(old):
+            self._gain(team, entry, t)
+        for entry in old.difference(new):
+            self._lose(team, entry)
+        self.observed[agent] = new
+
+    def message(self, agent):
+        '''Return the message for agent.'''
+        team = self.team_of[agent]
+        if agent in self.previous:
+            previous = self.previous.pop(agent)
+            entries = set(self.views[team])
+            return {'Objects': self.views[team], 'Since': self.since[team], 'Plan': self.plans[team],
+                    'Added': sorted(entries - previous), 'Removed': sorted(previous - entries)}
+        if team not in self.messages:
+            self.messages[team] = {'Objects': self.views[team], 'Since': self.since[team], 'Plan': self.plans[team],
+                                   'Added': sorted(self.added[team]), 'Removed': sorted(self.removed[team])}
+        return self.messages[team]
+
+    def _gain(self, team, entry, t):
+        counts = self.counts[team]
+        counts[entry] = counts.get(entry, 0) + 1
+        if counts[entry] == 1:
+            self.since[team][entry] = t
+            bisect.insort(self.views[team], entry)
+            if entry in self.removed[team]:  # lost and found again this tick is no change
+                del self.removed[team][entry]
+            else:
+                self.added[team][entry] = None
+
+    def _lose(self, team, entry):
+        counts = self.counts[team]
+        counts[entry] -= 1
+        if counts[entry] == 0:
+            del counts[entry]
+            del self.since[team][entry]
+            view = self.views[team]
+            del view[bisect.bisect_left(view, entry)]
+            if entry in self.added[team]:
+                del self.added[team][entry]
+            else:
+                self.removed[team][entry] = None
@@ -0,0 +1,305 @@
+'''
+A command line script to time headless runs of the vacuum environment from vacuum.py
+
+The suite runs the canonical scenarios under a fixed seed and writes ticks/sec and per-phase timings as JSON, so two
+commits can be compared:
+    python benchmark.py suite --sizes 20 50 --output before.json
+    python benchmark.py suite --sizes 20 50 --output after.json
+    python benchmark.py compare before.json after.json
+'''
+
+import argparse
+import json
+import random
+import sys
+import time
+
+import networkx as nx
+
+from vacuum import NewVacuumEnvironment, NewGreedyAgentWithoutRangePerception, NewGreedyDrone, set_seed, Dirt, \
+    VacuumEnvironment, XYAgent, NewGreedyAgentWithRangePerception, NewKMeansAgentWithNetworkComms
+from profiling import PhaseProfiler
+from comms import NetworkCommunicator
+from clustering import plan_team, solve_team
+from utils import distance2, vector_add
+
+
+def populate_team(env, num_roomba, num_drones, sensor_radius):
+    '''Add a test11 style team of roombas and drones at random locations.'''
+    for n in range(num_roomba):
+        env.add_object(NewGreedyAgentWithoutRangePerception(communication=True),
+                       location=(random.randrange(1, env.width - 2),
+                                 random.randrange(1, env.height - 2))).id = num_drones + n + 1
+    for n in range(num_drones):
+        env.add_object(NewGreedyDrone(sensor_radius=sensor_radius, communication=True),
+                       location=(random.randrange(1, env.width - 2), random.randrange(1, env.height - 2))).id = n + 1
+
+
+def time_ticks(env, steps):
+    '''Step the environment up to steps times and return (ticks run, seconds per tick).'''
+    t0 = env.t
+    tstart = time.perf_counter()
+    env.run(steps)
+    elapsed = time.perf_counter() - tstart
+    ticks = env.t - t0
+    return ticks, elapsed / max(ticks, 1)
+
+
+def bench_spatial_index(sizes=(25, 50, 100, 200), num_roomba=10, num_drones=5, sensor_radius=5, steps=50, seed=0):
+    '''
+    Time the per-tick cost of a fixed team as the grid, and the amount of dirt in it, grows.  With the spatial index
+    the object lookups done by the perceptors and actuators only touch the cells near each agent, so the per-tick
+    cost should stay roughly flat across sizes.
+    '''
+    results = []
+    for size in sizes:
+        set_seed(seed)
+        env = NewVacuumEnvironment(width=size, height=size, config='sparse dirt')
+        populate_team(env, num_roomba, num_drones, sensor_radius)
+        dirts = len(env.objects_of_type(Dirt))
+        ticks, per_tick = time_ticks(env, steps)
+        results.append((size, len(env.objects), dirts, ticks, per_tick))
+        print('size=%4s  objects=%6s  dirt=%6s  ticks=%4s  ms/tick=%.3f'
+              % (size, len(env.objects), dirts, ticks, 1000 * per_tick))
+    return results
+
+
+def reference_comms_network(env, comms_range):
+    '''The reachable sets as NetworkCommunicator used to compute them: a fresh nx.Graph of every pair within range,
+    then node_connectivity between from_agent and every agent near it.'''
+    network = nx.Graph()
+    for u in env.agents:
+        for v in [a for a in env.agents if distance2(u.location, a.location) <= comms_range ** 2]:
+            if not u is v: network.add_edge(u, v)
+    return {a: [o for o in env.agents if o is not a and distance2(a.location, o.location) <= comms_range ** 2
+                and nx.connectivity.node_connectivity(network, a, o)]
+            for a in env.agents}
+
+
+def bench_comms_topology(team_sizes=(10, 50, 100, 250, 500), size=50, comms_range=5, steps=20, reference_max=50,
+                         seed=0):
+    '''
+    Time NetworkCommunicator.setup plus a get_comms_network call for every agent, per tick, for growing teams of
+    randomly walking agents.  For teams up to reference_max the reachable sets are checked against (and timed
+    against) the old per-pair node_connectivity computation.
+    '''
+    results = []
+    for team_size in team_sizes:
+        set_seed(seed)
+        env = VacuumEnvironment(width=size, height=size)
+        for n in range(team_size):
+            location = (random.randrange(1, size - 1), random.randrange(1, size - 1))
+            env.add_object(XYAgent(), location=location).id = n + 1
+        communicator = NetworkCommunicator(env, range=comms_range)
+
+        elapsed = 0
+        reference_elapsed = 0
+        for step in range(steps):
+            for a in env.agents:
+                a.heading = random.choice([(1, 0), (0, 1), (-1, 0), (0, -1)])
+                env.move_to(a, vector_add(a.location, a.heading))
+
+            tstart = time.perf_counter()
+            communicator.setup()
+            networks = {a: communicator.get_comms_network(a) for a in env.agents}
+            elapsed += time.perf_counter() - tstart
+
+            if team_size <= reference_max:
+                tstart = time.perf_counter()
+                reference = reference_comms_network(env, comms_range)
+                reference_elapsed += time.perf_counter() - tstart
+                if reference != networks:
+                    raise AssertionError('reachable sets differ from the node_connectivity reference')
+
+        components = len(communicator.topology.components())
+        if team_size <= reference_max:
+            print('agents=%4s  components=%4s  ms/tick=%.3f  reference ms/tick=%.3f'
+                  % (team_size, components, 1000 * elapsed / steps, 1000 * reference_elapsed / steps))
+        else:
+            print('agents=%4s  components=%4s  ms/tick=%.3f' % (team_size, components, 1000 * elapsed / steps))
+        results.append((team_size, components, elapsed / steps))
+    return results
+
+
+def bench_kmeans_planning(team_sizes=(5, 10, 20, 40), dirt_counts=(50, 200, 1000), size=50, ticks=20, seed=0):
+    '''
+    Time the k-means roomba plan (clustering plus assignment) per tick for a team that all sees the same snapshot.
+    The team walks and one dirt is cleaned each tick; every agent asks for the plan, warm started from the team's last
+    means, and only the first one to ask does the solve.
+
+    Then, for every snapshot, the warm started solve is compared with a cold one (started from the vacuums' locations):
+    the k-means iterations of each are summed, and the ticks on which every vacuum is sent to the same mean are
+    counted.  As the snapshot changes, the two can end in different local optima.  A solve warm started from the cold
+    solve's own means, as when the snapshot doesn't change, must take fewer iterations and give the same assignment.
+    '''
+    results = []
+    for team_size in team_sizes:
+        for dirt_count in dirt_counts:
+            rng = random.Random(seed)
+            cells = [(x, y) for x in range(1, size - 1) for y in range(1, size - 1)]
+            dirts = rng.sample(cells, dirt_count)
+            vacuums = rng.sample(cells, team_size)
+            team = {}
+            snapshots = []
+            tstart = time.perf_counter()
+            for tick in range(ticks):
+                snapshot = (tuple(sorted(dirts)), tuple(sorted(vacuums)))
+                for agent in range(team_size):
+                    (clusters, means, assignment) = plan_team(snapshot[0], snapshot[1], team)
+                snapshots.append(snapshot + (team['init'],))
+                dirts.pop()
+                vacuums = [(x + rng.choice((-1, 0, 1)), y) for (x, y) in vacuums]
+            elapsed = (time.perf_counter() - tstart) / ticks
+
+            tstart = time.perf_counter()
+            solve_team(snapshot[0], snapshot[1])
+            cold = time.perf_counter() - tstart
+
+            warm_iterations = cold_iterations = same = 0
+            for (dirts_seen, vacuums_seen, init) in snapshots:
+                warm_plan = solve_team(dirts_seen, vacuums_seen, init, return_iterations=True)
+                cold_plan = solve_team(dirts_seen, vacuums_seen, return_iterations=True)
+                warm_iterations += warm_plan[3]
+                cold_iterations += cold_plan[3]
+                same += [warm_plan[1][i] for i in warm_plan[2]] == [cold_plan[1][i] for i in cold_plan[2]]
+                rerun = solve_team(dirts_seen, vacuums_seen, cold_plan[1], return_iterations=True)
+                if rerun[2] != cold_plan[2] or rerun[3] >= cold_plan[3]:
+                    raise AssertionError('a solve warm started from its own means changed the plan or took as long')
+
+            print('agents=%3s  dirt=%5s  ms/tick (whole team)=%.3f  cold solve ms=%.3f  '
+                  'iterations warm/cold=%s/%s  same targets=%s/%s'
+                  % (team_size, dirt_count, 1000 * elapsed, 1000 * cold, warm_iterations, cold_iterations, same, ticks))
+            results.append((team_size, dirt_count, elapsed, cold, warm_iterations, cold_iterations))
+    return results
+
+
+# the canonical scenarios: every config is run with every team, at every size it fits in
+SUITE_CONFIGS = ['random dirt', 'sparse dirt', 'corner dirt', 'center walls w/ random dirt and fire']
+SUITE_SIZES = [20, 50]
+SUITE_STEPS = 100
+# 'corner dirt' lays its dirt out for a 50x50 grid, so on smaller grids it can never be cleaned up
+SUITE_MIN_SIZES = {'corner dirt': 50}
+
+def greedy_team(env, team_size):
+    for n in range(team_size):
+        env.add_object(NewGreedyAgentWithRangePerception(sensor_radius=5, communication=True),
+                       location=(random.randrange(1, env.width - 2), random.randrange(1, env.height - 2))).id = n + 1
+
+def roomba_drone_team(env, team_size):
+    populate_team(env, team_size - team_size // 3, team_size // 3, sensor_radius=5)
+
+def kmeans_team(env, team_size):
+    for n in range(team_size):
+        env.add_object(NewKMeansAgentWithNetworkComms(sensor_radius=10, comms_range=10),
+                       location=(random.randrange(1, env.width - 2), random.randrange(1, env.height - 2))).id = n + 1
+
+SUITE_TEAMS = {'greedy': greedy_team, 'roomba+drone': roomba_drone_team, 'kmeans': kmeans_team}
+
+
+def run_scenario(config, team, size, steps=100, seed=0, batch=False):
+    '''
+    Run one scenario headless with a profiler attached and return its result record: ticks run, wall time, ticks/sec
+    and the per-phase breakdown from PhaseProfiler.report().
+    '''
+    set_seed(seed)
+    env = NewVacuumEnvironment(width=size, height=size, config=config, batch=batch)
+    SUITE_TEAMS[team](env, max(size // 5, 2))
+    env.profiler = PhaseProfiler()
+    tstart = time.perf_counter()
+    env.run(steps)
+    elapsed = time.perf_counter() - tstart
+    ticks = env.t
+    return {'config': config, 'team': team, 'size': size, 'agents': len(env.agents), 'seed': seed, 'batch': batch,
+            'ticks': ticks, 'seconds': elapsed, 'ticks_per_sec': ticks / elapsed if elapsed else 0.0,
+            'phases': env.profiler.report()}
+
+
+def run_suite(configs=SUITE_CONFIGS, teams=list(SUITE_TEAMS), sizes=SUITE_SIZES, steps=SUITE_STEPS, seed=0,
+              batch=False):
+    '''Run every config x team x size scenario, skipping configs too big for the size, and return the list of result
+    records.'''
+    results = []
+    for size in sizes:
+        for config in configs:
+            if size < SUITE_MIN_SIZES.get(config, 0):
+                print('%-40s skipped at size=%s, it needs size>=%s' % (config, size, SUITE_MIN_SIZES[config]),
+                      file=sys.stderr)
+                continue
+            for team in teams:
+                r = run_scenario(config, team, size, steps=steps, seed=seed, batch=batch)
+                slowest = next(iter(r['phases']), '')
+                print('%-40s %-14s size=%3s  ticks=%4s  ticks/sec=%9.1f  slowest=%s'
+                      % (config, team, size, r['ticks'], r['ticks_per_sec'], slowest), file=sys.stderr)
+                results.append(r)
+    return results
+
+
+def compare_suites(old, new):
+    '''Print the ticks/sec of each scenario in new relative to the same scenario in old (e.g. two commits).'''
+    key = lambda r: (r['config'], r['team'], r['size'])
+    baseline = {key(r): r for r in old}
+    for r in new:
+        if key(r) not in baseline:
+            continue
+        b = baseline[key(r)]
+        if b['ticks'] != r['ticks']:
+            print('warning: %s ran %s ticks before and %s now' % (key(r), b['ticks'], r['ticks']), file=sys.stderr)
+        ratio = r['ticks_per_sec'] / b['ticks_per_sec'] if b['ticks_per_sec'] else float('inf')
+        print('%-40s %-14s size=%3s  %9.1f -> %9.1f ticks/sec  x%.2f'
+              % (r['config'], r['team'], r['size'], b['ticks_per_sec'], r['ticks_per_sec'], ratio))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("benchmark", choices=['spatial', 'comms', 'kmeans', 'suite', 'compare'],
+                        help="Which benchmark to run")
+    parser.add_argument("--sizes", type=int, nargs='+', default=None,
+                        help="Grid widths (and heights) to time (default 25 50 100 200, or %s for the suite)"
+                             % ' '.join(str(size) for size in SUITE_SIZES))
+    parser.add_argument("--team-sizes", type=int, nargs='+', default=[10, 50, 100, 250, 500],
+                        help="Team sizes to time the comms topology with")
+    parser.add_argument("--steps", type=int, default=None,
+                        help="Number of steps to time for each configuration (default 50, or %s for the suite)"
+                             % SUITE_STEPS)
+    parser.add_argument("--seed", type=int, default=0, help="Seed used to build every scenario")
+    parser.add_argument("--configs", nargs='+', default=SUITE_CONFIGS,
+                        help="NewVacuumEnvironment configs to run in the suite")
+    parser.add_argument("--teams", nargs='+', choices=list(SUITE_TEAMS), default=list(SUITE_TEAMS),
+                        help="Agent teams to run in the suite")
+    parser.add_argument("--batch", action='store_true',
+                        help="Step the suite's environments with the batched NumPy engine")
+    parser.add_argument("--output", default=None, help="File to write the suite's JSON results to (default stdout)")
+    parser.add_argument("results", nargs='*', help="For compare: the old and new suite JSON files")
+    args = parser.parse_args()
+
+    # the suite has its own canonical sizes and steps, so that its results can be compared from run to run
+    if args.benchmark == 'suite':
+        (sizes, steps) = (args.sizes or SUITE_SIZES, args.steps or SUITE_STEPS)
+    else:
+        (sizes, steps) = (args.sizes or [25, 50, 100, 200], args.steps or 50)
+
+    if args.benchmark == 'spatial':
+        bench_spatial_index(sizes=sizes, steps=steps, seed=args.seed)
+    elif args.benchmark == 'comms':
+        bench_comms_topology(team_sizes=args.team_sizes, steps=steps, seed=args.seed)
+    elif args.benchmark == 'kmeans':
+        bench_kmeans_planning(seed=args.seed)
+    elif args.benchmark == 'suite':
+        results = run_suite(configs=args.configs, teams=args.teams, sizes=sizes, steps=steps, seed=args.seed,
+                            batch=args.batch)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(results, f, indent=1)
+        else:
+            json.dump(results, sys.stdout, indent=1)
+    elif args.benchmark == 'compare':
+        if len(args.results) != 2:
+            parser.error("compare takes the old and the new suite JSON files")
+        with open(args.results[0]) as f:
+            old = json.load(f)
+        with open(args.results[1]) as f:
+            new = json.load(f)
+        compare_suites(old, new)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+'''
+This file holds the clustering and assignment used by the k-means agent programs.
+
+'''
+
+import random
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+from utils import memoize
+
+
+def k_means(X, k, n=100, init=None, return_iterations=False):
+    '''
+    Lloyd's algorithm on the points X.  Starts from the means in init (or k points sampled from X if init is not
+    given or has the wrong size) and stops as soon as no point changes cluster, or after n iterations.
+    Points are assigned to the closest mean, ties going to the lowest index.  A mean whose cluster is empty stays where
+    it is.  Returns (clusters, means): clusters[i] is the list of points closest to means[i].  With
+    return_iterations=True, returns (clusters, means, iterations), where iterations counts the assignment steps done.
+    '''
+    if init is None or len(init) != k:
+        if k <= len(X):
+            init = random.sample(list(X), k)
+        else:
+            init = list(X) + random.choices(list(X), k=k - len(X))
+
+    points = np.asarray(X, dtype=float).reshape(-1, 2)
+    means = np.array(init, dtype=float).reshape(-1, 2)
+    labels = None
+    iterations = 0
+    for i in range(n):
+        iterations += 1
+        # using distance squared because square roots are expensive and argmin(x) == argmin(x^2)
+        dists = ((points[:, None, :] - means[None, :, :]) ** 2).sum(axis=2)
+        new_labels = dists.argmin(axis=1)
+        if labels is not None and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        counts = np.bincount(labels, minlength=k)
+        sums = np.zeros_like(means)
+        np.add.at(sums, labels, points)
+        filled = counts > 0
+        means[filled] = sums[filled] / counts[filled, None]
+
+    clusters = [[] for i in range(k)]
+    if labels is not None:
+        for (x, label) in zip(X, labels.tolist()):
+            clusters[label].append(x)
+    if return_iterations:
+        return (clusters, [tuple(u) for u in means.tolist()], iterations)
+    return (clusters, [tuple(u) for u in means.tolist()])
+
+
+def optimal_assignments(ag_locs, means):
+    '''
+    Return the index of the mean assigned to each agent location, such that every mean is assigned to one agent and
+    the total distance travelled is the least possible (Hungarian algorithm).
+    '''
+    ag = np.asarray(ag_locs, dtype=float).reshape(-1, 2)
+    mu = np.asarray(means, dtype=float).reshape(-1, 2)
+    cost = np.hypot(ag[:, None, 0] - mu[None, :, 0], ag[:, None, 1] - mu[None, :, 1])
+    (rows, cols) = linear_sum_assignment(cost)
+    assignment = [None] * len(ag_locs)
+    for (r, c) in zip(rows.tolist(), cols.tolist()):
+        assignment[r] = c
+    return assignment
+
+
+def solve_team(dirts, vacuums, init=None, return_iterations=False):
+    '''
+    Cluster the dirt locations around len(vacuums) means, starting from the means in init (the vacuums' locations if
+    init is not given), and assign one mean to each vacuum.  Returns (clusters, means, assignment) as tuples, where
+    assignment[i] is the index of the mean (and cluster) for vacuums[i], followed by the number of k-means iterations
+    if return_iterations is True.  Nothing is cached: this is the solve that plan_team memoizes.
+    '''
+    # init must have the right size, so that k_means never draws from random and the result only depends on the args
+    if init is None or len(init) != len(vacuums):
+        init = vacuums
+    (clusters, means, iterations) = k_means(dirts, k=len(vacuums), init=init, return_iterations=True)
+    assignment = optimal_assignments(vacuums, means)
+    plan = (tuple(tuple(c) for c in clusters), tuple(means), tuple(assignment))
+    return plan + (iterations,) if return_iterations else plan
+
+# the plan only depends on the snapshot and the starting means, so it can be cached across agents, ticks and runs
+_plan_team_cached = memoize(solve_team, maxsize=256)
+
+
+def plan_team(dirts, vacuums, team=None):
+    '''
+    Return the plan (clusters, means, assignment) of solve_team() for the snapshot (dirts, vacuums), both sorted tuples
+    of locations.  Results are memoized, so agents that ask for the same plan share one solve.
+
+    team is a dict kept by the team across ticks.  The means of the last plan are kept in it, and the first time the
+    team asks about a new snapshot, they are taken as the starting means of its solve (a warm start; the vacuums'
+    locations are used if the number of vacuums changed).  Every member of the team that asks about that snapshot
+    then starts from the same means, so they share the solve and agree on the plan.  Without team, the solve starts
+    from the vacuums' locations.
+    '''
+    if team is None:
+        return _plan_team_cached(dirts, vacuums, vacuums)
+    if team.get('snapshot') != (dirts, vacuums):
+        means = team.get('means', ())
+        team['init'] = means if len(means) == len(vacuums) else vacuums
+        team['snapshot'] = (dirts, vacuums)
+    plan = _plan_team_cached(dirts, vacuums, team['init'])
+    team['means'] = plan[1]
+    return plan
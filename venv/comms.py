@@ -0,0 +1,219 @@
+import agents
+import networkx as nx
+from utils import distance2
+from beliefs import BeliefMap
+
+class Communicator():
+    '''
+    A Communicator shares what the agents observe through a BeliefMap: each agent publishes its observations once a
+    tick, and every agent is then handed the shared message of its team as agent.comms['Team'].
+    '''
+    def __init__(self, env):
+        self.env = env
+        self.beliefs = BeliefMap()
+
+
+    def setup(self):
+        for a in self.env.agents:
+            a.comms = {}
+        self.beliefs.regroup(self.components())
+
+
+    def components(self):
+        '''return the groups of Agents that are able to pass messages to each other'''
+        return [self.env.agents]
+
+
+    def publish(self, from_agent):
+        '''send the changes in what from_agent observes to the belief map of its team'''
+        self.beliefs.publish(from_agent, from_agent.percepts.get('Objects', ()), self.env.t)
+
+
+    def deliver(self):
+        '''hand every Agent the message of its team, once all of them have published'''
+        for a in self.env.agents:
+            a.comms = {'Team': self.beliefs.message(a)}
+
+
+    def get_comms_network(self, from_agent):
+        '''return the list of Agents that the from_agent is able to communicate with'''
+        return [a for a in self.env.agents if not a is from_agent]
+
+
+    def communicate(self, message, from_agent, to_agent):
+        '''communicate a message from the from_agent to the to_agent'''
+        to_agent.comms[from_agent.id] = message
+
+
+class BroadcastCommunicator(Communicator):
+    '''
+    Agents within self.range of each other hear each other's broadcasts, and messages are relayed, so a team is every
+    agent that can be reached through a chain of agents in range (the connected components of the network), just as
+    for a NetworkCommunicator.
+    '''
+    def __init__(self, env, range=5):
+        Communicator.__init__(self, env)
+        self.range = range
+
+
+    def get_comms_network(self, to_agent):
+        return [o for o in self.env.objects_near(to_agent.location, self.range)
+                if isinstance(o, agents.Agent) and to_agent != o]
+
+
+    def components(self):
+        '''return the connected components of the network, found with a breadth first search'''
+        groups = []
+        found = set()
+        for a in self.env.agents:
+            if a in found:
+                continue
+            found.add(a)
+            group = [a]
+            for b in group:  # group grows as the search goes
+                for c in self.get_comms_network(b):
+                    if c not in found:
+                        found.add(c)
+                        group.append(c)
+            groups.append(group)
+        return groups
+
+
+class CommsTopology():
+    '''
+    Keeps the communication links between agents up to date as they move, instead of rebuilding the whole network
+    every tick.  Agents are filed in square buckets whose side is the communication range, so an agent's neighbors
+    can only be in the 3x3 block of buckets around it; only agents that moved since the last update have their links
+    recomputed.  Connected components are kept in a union-find: new links are merged in as they appear, and the
+    union-find is rebuilt from the links only on ticks where a link was broken.
+    '''
+    def __init__(self, range=5):
+        self.range = range
+        self.location = {}      # agent -> location the agent's links were computed at
+        self.buckets = {}       # (bx, by) -> {agent: None}
+        self.neighbors = {}     # agent -> {agent: None} within range
+        self.parent = {}        # union-find forest over agents
+
+    def bucket_of(self, location):
+        return (int(location[0] // self.range), int(location[1] // self.range)) if self.range > 0 else tuple(location)
+
+    def update(self, agents):
+        '''Bring the links and components in line with the current locations of agents.'''
+        broken = False
+        current = set(agents)
+        for a in [a for a in self.location if a not in current]:
+            broken |= self._remove(a)
+
+        moved = [a for a in agents if self.location.get(a, None) != a.location]
+        for a in moved:
+            if a in self.location:
+                broken |= self._remove(a)
+            self.location[a] = a.location
+            self.buckets.setdefault(self.bucket_of(a.location), {})[a] = None
+            self.neighbors[a] = {}
+            self.parent[a] = a
+
+        new_links = []
+        for a in moved:
+            for b in self._in_range(a):
+                if b not in self.neighbors[a]:
+                    self.neighbors[a][b] = None
+                    self.neighbors[b][a] = None
+                    new_links.append((a, b))
+
+        if broken:
+            self.parent = {a: a for a in self.location}
+            for a, nbrs in self.neighbors.items():
+                for b in nbrs:
+                    self._union(a, b)
+        else:
+            for a, b in new_links:
+                self._union(a, b)
+
+    def component_of(self, agent):
+        '''Return the root agent of the connected component that agent belongs to.'''
+        return self._find(agent)
+
+    def components(self):
+        '''Return the connected components as a list of lists of agents.'''
+        groups = {}
+        for a in self.location:
+            groups.setdefault(self._find(a), []).append(a)
+        return list(groups.values())
+
+    def reachable(self, u, v):
+        '''Return True if there is a chain of links from u to v.'''
+        return u in self.parent and v in self.parent and self._find(u) is self._find(v)
+
+    def _in_range(self, a):
+        (bx, by) = self.bucket_of(a.location)
+        r2 = self.range ** 2
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for b in self.buckets.get((bx + dx, by + dy), ()):
+                    if b is not a and distance2(a.location, b.location) <= r2:
+                        yield b
+
+    def _remove(self, a):
+        '''Drop an agent and its links; return True if any link was broken.'''
+        key = self.bucket_of(self.location.pop(a))
+        bucket = self.buckets[key]
+        del bucket[a]
+        if not bucket:
+            del self.buckets[key]
+        nbrs = self.neighbors.pop(a)
+        for b in nbrs:
+            del self.neighbors[b][a]
+        del self.parent[a]
+        return bool(nbrs)
+
+    def _find(self, a):
+        root = a
+        while self.parent[root] is not root:
+            root = self.parent[root]
+        while self.parent[a] is not root:  # path compression
+            self.parent[a], a = root, self.parent[a]
+        return root
+
+    def _union(self, a, b):
+        ra, rb = self._find(a), self._find(b)
+        if ra is not rb:
+            self.parent[rb] = ra
+
+
+class NetworkCommunicator(Communicator):
+    def __init__(self, env, range=5):
+        Communicator.__init__(self, env)
+        self.range = range
+
+        self.topology = CommsTopology(range)
+        self.order = {}
+
+
+    def setup(self):
+        self.build_network()
+        Communicator.setup(self)
+
+
+    def components(self):
+        return self.topology.components()
+
+
+    def get_comms_network(self, from_agent):
+        # agents within range are linked directly, so they are always connected to from_agent
+        return sorted(self.topology.neighbors.get(from_agent, ()), key=self.order.__getitem__)
+
+
+    def build_network(self):
+        self.order = {a: i for (i, a) in enumerate(self.env.agents)}
+        self.topology.update(self.env.agents)
+
+
+    @property
+    def network(self):
+        '''The communication network as an nx.Graph, built on demand for inspection.'''
+        network = nx.Graph()
+        for u, nbrs in self.topology.neighbors.items():
+            for v in nbrs:
+                network.add_edge(u, v)
+        return network
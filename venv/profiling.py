@@ -0,0 +1,41 @@
+'''
+This file holds the per-phase profiler for Environment.step.
+
+Set env.profiler = PhaseProfiler() to have the environment record wall time and call counts for each phase of a step:
+    percept.<Perceptor class>, communicate, state_estimator, program, execute_action.<action>, exogenous_change
+(the BatchEngine records its batched percept and action phases as percept.batch and execute_action.batch).  With
+env.profiler left as None the only cost is one check per phase.
+'''
+
+import time
+
+
+class PhaseProfiler():
+    def __init__(self):
+        self.seconds = {}
+        self.calls = {}
+
+    def record(self, phase, elapsed, calls=1):
+        self.seconds[phase] = self.seconds.get(phase, 0.0) + elapsed
+        self.calls[phase] = self.calls.get(phase, 0) + calls
+
+    def time(self, phase, fn, *args):
+        '''Call fn(*args), recording its wall time under phase, and return its result.'''
+        tstart = time.perf_counter()
+        result = fn(*args)
+        self.record(phase, time.perf_counter() - tstart)
+        return result
+
+    def reset(self):
+        self.seconds = {}
+        self.calls = {}
+
+    def report(self):
+        '''Return {phase: {'seconds': total wall time, 'calls': number of calls}}, slowest phase first.'''
+        return {phase: {'seconds': self.seconds[phase], 'calls': self.calls[phase]}
+                for phase in sorted(self.seconds, key=self.seconds.get, reverse=True)}
+
+    def print_report(self):
+        total = sum(self.seconds.values()) or 1
+        for (phase, r) in self.report().items():
+            print('%-40s %10.4f s %6.1f%% %10s calls' % (phase, r['seconds'], 100 * r['seconds'] / total, r['calls']))
@@ -0,0 +1,257 @@
+# define the list of programs available to agents
+
+import random, math
+import numpy as np
+from scipy import spatial
+from utils import distance, distance2, unit_vector, vector_add, scalar_vector_product, vector_average
+from clustering import k_means, optimal_assignments, plan_team
+
+
+########################################################################################################################
+#
+#   PROGRAMS
+#
+########################################################################################################################
+
+def random_reflex_generator(actions):
+    def p_random_reflex(percept):
+        if percept['Dirty']:
+            return "GrabObject"
+        elif percept['Bump']:
+            return random.choice(['TurnRight', 'TurnLeft'])
+        else:
+            return random.choice(actions)
+    return p_random_reflex
+
+
+def _old_greedy_agent_generator():
+    def p_old_greedy_agent(percepts):
+        if percepts['Dirty']:
+            return "Grab"
+        else:
+            dirts = [o[1] for o in percepts['Objects'] if o[0] == 'Dirt']
+            agent_location = percepts['GPS']
+            agent_heading = percepts['Compass']
+            if dirts:
+                nearest_dirt = find_nearest(agent_location, dirts)
+                command = go_to(agent_location, agent_heading, nearest_dirt, percepts['Bump'])
+                return command
+            return ''
+    return p_old_greedy_agent
+
+def dag_roomba_generator():
+    def p_dag_roomba(percepts):
+        agent_location = percepts['GPS']
+        agent_heading = percepts['Compass']
+        dirt_target = (1,1)
+
+
+
+
+        command = go_to(agent_location, agent_heading, dirt_target, percepts['Bump'])
+        return command
+
+    return p_dag_roomba
+
+def kmeans_roomba_generator():
+    own_plan = {}   # warm start state for when the agent has no team to share it with
+    def p_kmeans_roomba(percepts):
+        if percepts['Dirty']:
+            return 'GrabObject'
+        else:
+            agent_location = percepts['GPS']
+            agent_heading = percepts['Compass']
+            # collect communication data
+            # use a set comprehension to remove duplicates, sorted so that teammates with the same view share a plan
+
+            dirts = tuple(sorted({o[1] for o in percepts['Objects'] if o[0] == 'Dirt'}))
+
+            if dirts:
+                vacuums = tuple(sorted({o[1] for o in percepts['Objects'] if o[0] == 'Roomba'}))
+                (dirt_clusters, dirt_means, assignment) = plan_team(dirts, vacuums, percepts.get('Plan', own_plan))
+
+                my_mean = assignment[vacuums.index(agent_location)]
+                my_cluster = dirt_clusters[my_mean]
+                if my_cluster == ():
+                    nearest_dirt = dirt_means[my_mean]
+                else:
+                    #print('empty cluster')
+                    nearest_dirt = find_nearest(agent_location, dirts)
+                command = go_to(agent_location, agent_heading, nearest_dirt, percepts['Bump'])
+                return command
+
+            return random.choice(['TurnRight', 'TurnLeft', 'MoveForward', 'MoveForward', 'MoveForward', 'MoveForward'])
+    return p_kmeans_roomba
+
+
+def greedy_roomba_generator():
+    def p_greedy_roomba(percepts):
+        if percepts['Dirty']:
+            return 'GrabObject'
+        else:
+            agent_location = percepts['GPS']
+            agent_heading = percepts['Compass']
+            # collect communication data
+            # use a set comprehension to remove duplicates and convert back to a list
+            if 'Objects' in percepts:
+                dirts = {o[1] for o in percepts['Objects'] if o[0] == 'Dirt'}
+                vacuums = {o[1] for o in percepts['Objects'] if o[0] == 'Roomba'}   # TODO: This needs a better way to detect vacuums
+                unoccupied_dirts = list(dirts - vacuums)
+            else:
+                dirts = set()
+                vacuums = set()
+                unoccupied_dirts = set()
+
+            if unoccupied_dirts:
+                nearest_dirt = find_nearest(agent_location, unoccupied_dirts)
+                command = go_to(agent_location, agent_heading, nearest_dirt, percepts['Bump'])
+                return command
+
+            return random.choice(['TurnRight', 'TurnLeft', 'MoveForward', 'MoveForward', 'MoveForward', 'MoveForward'])
+    return p_greedy_roomba
+
+def greedy_drone_generator(sensor_radius):
+    def p_greedy_drone(percepts):
+        agent_location = percepts['GPS']
+        agent_heading = percepts['Compass']
+        # collect communication data
+        dirts = [o[1] for o in percepts['Objects'] if o[0] == 'Dirt']
+        drones = [d[1] for d in percepts['Objects'] if d[0] == 'Drone' and d[1] != agent_location]
+
+        if dirts:
+            close_dirts = [d for d in dirts if distance2(d,agent_location)<(sensor_radius*.75)**2]
+            if close_dirts: # if there are dirts close to you, move towards the center (of mass) of them
+                target = vector_average(close_dirts)
+            else: # if there are no dirts close to you, move towards the closest dirt
+                target = find_nearest(agent_location, dirts)
+
+            if drones:  # if there are drones around, move away from them by half your sensor radius
+                targets = [target]
+                for d in [d for d in drones if distance2(d, agent_location) < (sensor_radius) ** 2]:
+                    targets.append(vector_add(scalar_vector_product(sensor_radius * .5,
+                                   vector_add(agent_location, scalar_vector_product(-1, d))), agent_location))
+                target = vector_average(targets)
+
+            command = go_to(agent_location, agent_heading, target, bump=False)
+            return command
+        elif drones: # if no dirts, but there are drones around
+            targets = []
+            for d in [d for d in drones if distance2(d, agent_location) < (sensor_radius) ** 2]:
+                targets.append(vector_add(scalar_vector_product(sensor_radius*.5,
+                               vector_add(agent_location,scalar_vector_product(-1,d))),agent_location))
+            if targets:
+                target = vector_average(targets)
+                return go_to(agent_location, agent_heading, target, bump=False)
+            else:
+                return random.choice(
+                    ['TurnRight', 'TurnLeft', 'MoveForward', 'MoveForward', 'MoveForward', 'MoveForward'])
+        else:  # if no dirts and no drones, make a random action
+            return random.choice(['TurnRight', 'TurnLeft', 'MoveForward', 'MoveForward', 'MoveForward', 'MoveForward'])
+    return p_greedy_drone
+
+def rule_program_generator():
+    def p_rule_program(percept):
+        state = interpret_input(percept)
+        rule = rule_match(state, rules)
+        action = rule.action
+        return action
+    return p_rule_program
+########################################################################################################################
+#
+#   STATE ESTIMATORS
+#
+########################################################################################################################
+
+def basic_state_estimator_generator():
+    def se_basic_state_estimator(percepts, comms, state=None):
+        if state: raise NotImplementedError # this hasn't been done yet...
+        if 'Team' in comms:
+            # the team's belief map already holds this agent's own observations, and the list is shared by the team
+            percepts['Objects'] = comms['Team']['Objects']
+            percepts['Plan'] = comms['Team']['Plan']
+        else:
+            # remove duplicates, sorted so that the order doesn't depend on the string hash seed
+            percepts['Objects'] = sorted(set(percepts.get('Objects', [])))
+        return percepts
+    return se_basic_state_estimator
+
+
+def graph_state_estimator_generator():
+    def se_graph_state_estimator(percepts, comms, state=None):
+        if 'Team' in comms:
+            percepts['Objects'] = comms['Team']['Objects']
+            percepts['Plan'] = comms['Team']['Plan']
+        elif not 'Objects' in percepts:
+            percepts['Objects'] = []
+
+        if state:
+            for k in state.keys():
+                pass # merge the values of the state with the values of the
+        else:   # if state is None then there is no state estimation and just pass through the percepts
+            state = percepts
+        return state
+    return se_graph_state_estimator
+
+########################################################################################################################
+#
+#   HELPERS
+#
+########################################################################################################################
+
+def find_nearest(agent_location, dirts):
+    dists = [distance2(agent_location, d) for d in dirts]
+    return dirts[dists.index(min(dists))]
+
+def go_to(agent_location, agent_heading, nearest_dirt, bump):
+    if agent_heading[0] == 0:
+        '''up or down'''
+        if (nearest_dirt[1] - agent_location[1]) * agent_heading[1] > 0 and not bump:
+            return 'MoveForward'
+        else:
+            if nearest_dirt[0] - agent_location[0] > 0:
+                '''dirt to right'''
+                if agent_heading[1] == 1:
+                    return 'TurnRight'
+                else:
+                    return 'TurnLeft'
+            else:
+                if agent_heading[1] == 1:
+                    return 'TurnLeft'
+                else:
+                    return 'TurnRight'
+    else:
+        '''left or right'''
+        if (nearest_dirt[0] - agent_location[0]) * agent_heading[0] > 0 and not bump:
+            return 'MoveForward'
+        else:
+            if nearest_dirt[1] - agent_location[1] > 0:
+                '''dirt to down'''
+                if agent_heading[0] == 1:
+                    return 'TurnLeft'
+                else:
+                    return 'TurnRight'
+            else:
+                if agent_heading[0] == 1:
+                    return 'TurnRight'
+                else:
+                    return 'TurnLeft'
+
+
+if __name__ == '__main__':
+    X = [(random.gauss(5,1), random.gauss(10,3)) for x in range(10)] + [(random.gauss(10,2), random.gauss(5,2)) for x in range(20)]
+    print(X)
+    (c,m) = k_means(X, 5, 5)
+
+    print(c)
+    print(m)
+
+    agent_locs = [(5,5),(5,10),(10,5),(10,10),(7.5,7.5)]
+    assignments = optimal_assignments(agent_locs,m)
+
+    print('assignments =', list(zip(agent_locs, [m[i] for i in assignments])))
+
+    import matplotlib.pyplot as plot
+
+    plot.plot(*zip(*X),'b.')
+    plot.plot(*zip(*m),'r*')
+    plot.show()
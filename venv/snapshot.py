@@ -0,0 +1,163 @@
+'''
+This file holds the snapshots used to copy built environments cheaply, in place of copy.deepcopy or building the
+scenario again.
+
+A snapshot records the scenario held by an XYEnvironment (or VacuumEnvironment) without copying it object by object.
+Walls and dead cells never change, so the snapshot keeps one copy of them, along with an index of them, and every
+environment spawned from it shares that copy: its SpatialIndex is layered over the snapshot's index of them rather than
+copying it.  The copy is made when the snapshot is taken, so the environment it was taken of keeps its own walls.
+Nothing may change the shared walls and dead cells, or set attributes on them, as the change would show up in every
+spawned environment.  Removing one through the environment is safe, as its index then stops sharing the base layer, but
+moving one is not, as that sets its location.  EnvFrame sets attributes on the objects it draws, so only one of the
+environments spawned from a snapshot can be shown at a time.  Dirt and fire are kept as columns (positions in the
+.objects order, locations, ids, colors, fire timers) and created fresh on each spawn.  Apart from copying the .objects
+list, which is a flat list of references, spawning costs time in proportion to the dirt and fire only.  The spontaneous
+changes of a VacuumEnvironment are not copied either: they are attached again from its config.
+
+Agents can't be snapshotted, as their programs keep their state in closures that can't be copied.  Take the snapshot
+before adding the agents, as compare_agents and the test scenarios do.
+
+to_dict()/from_dict() (and save()/load()) give a JSON form of a snapshot, so that a scenario template can be built
+once and loaded quickly in another process without pickling the environment.
+'''
+
+import copy
+import json
+
+from objects import Dirt, Wall, DeadCell, Fire
+from spatial import SpatialIndex
+
+# the exact classes of the objects that are shared between copies (a Fire is a Wall, but it burns out)
+STATIC_CLASSES = (Wall, DeadCell)
+
+
+def new_static(cls, location, id=''):
+    '''Return a fresh static object of class cls at location, to be shared by the spawns of a snapshot.'''
+    obj = cls(id=id)
+    obj.location = location
+    obj.holding = []
+    obj.held = None
+    return obj
+
+
+class EnvSnapshot():
+    def __init__(self, env_class, width, height, t=0, config=None, batch=False):
+        self.env_class = env_class
+        self.width = width
+        self.height = height
+        self.t = t
+        self.config = config
+        self.batch = batch
+        self.template = []                  # the .objects list with the static objects filled in and None elsewhere
+        self.static_index = SpatialIndex()  # index of the static objects, filed in .objects order, shared by spawns
+        self.dirt = {'order': [], 'location': [], 'id': [], 'color': []}
+        self.fire = {'order': [], 'location': [], 't': []}
+        self.others = []                    # (position, object) for any other object, deep copied on spawn
+        self.problem = None
+
+    @classmethod
+    def of(cls, env):
+        '''Take a snapshot of env, which must not hold any agents.'''
+        if env.agents:
+            raise ValueError("Can't snapshot an environment holding agents, take the snapshot before adding them")
+        snapshot = cls(type(env), env.width, env.height, t=env.t, config=getattr(env, 'config', None),
+                       batch=getattr(env, 'batch', False))
+        snapshot.template = [None] * len(env.objects)
+        for (i, obj) in enumerate(env.objects):
+            if type(obj) in STATIC_CLASSES:
+                static = new_static(type(obj), obj.location, obj.id)
+                snapshot.template[i] = static
+                snapshot.static_index.add(static, seq=i)
+            elif type(obj) is Dirt:
+                snapshot.add_column(snapshot.dirt, order=i, location=obj.location, id=obj.id, color=obj.color)
+            elif type(obj) is Fire:
+                snapshot.add_column(snapshot.fire, order=i, location=obj.location, t=obj.t)
+            else:
+                snapshot.others.append((i, copy.deepcopy(obj)))
+        snapshot.problem = env.problem
+        return snapshot
+
+    @staticmethod
+    def add_column(columns, **values):
+        for (name, value) in values.items():
+            columns[name].append(value)
+
+    def spawn(self, batch=None):
+        '''Return a new environment holding the scenario.  batch overrides how the new environment is stepped.'''
+        env = self.env_class.__new__(self.env_class)
+        env.restore(self)
+        if batch is not None:
+            env.batch = batch
+        return env
+
+    def populate(self, env):
+        '''Fill the freshly initialized env with the objects of the scenario.'''
+        objects = list(self.template)
+        index = SpatialIndex(self.static_index.bucket_size, base=self.static_index)
+        new = [Dirt(id=id, color=color) for (id, color) in zip(self.dirt['id'], self.dirt['color'])]
+        locations = list(self.dirt['location'])
+        order = list(self.dirt['order'])
+        for t in self.fire['t']:
+            fire = Fire()
+            fire.t = t
+            new.append(fire)
+        locations += self.fire['location']
+        order += self.fire['order']
+        for (i, obj) in self.others:
+            new.append(copy.deepcopy(obj))
+            locations.append(obj.location)
+            order.append(i)
+
+        for (obj, location, i) in zip(new, locations, order):
+            obj.location = location
+            obj.holding = []
+            obj.held = None
+            objects[i] = obj
+        index.add_all(new, order)
+        index.next_seq = len(objects)
+
+        env.t = self.t
+        env.objects = objects
+        env.index = index
+        if self.problem is not None:
+            env.problem = copy.copy(self.problem)
+            env.problem.env = env
+
+    def to_dict(self):
+        '''Return the snapshot as a dictionary of plain lists that can be written out as JSON.'''
+        if self.others or self.problem is not None:
+            raise ValueError("Only walls, dirt and fire can be written out, not %s"
+                             % ([obj for (i, obj) in self.others] + ([self.problem] if self.problem else [])))
+        statics = [(i, obj) for (i, obj) in enumerate(self.template) if obj is not None]
+        return {'env_class': self.env_class.__name__, 'width': self.width, 'height': self.height, 't': self.t,
+                'config': self.config, 'batch': self.batch, 'size': len(self.template),
+                'static': {'order': [i for (i, obj) in statics],
+                           'class': [type(obj).__name__ for (i, obj) in statics],
+                           'location': [list(obj.location) for (i, obj) in statics]},
+                'dirt': dict(self.dirt, location=[list(l) for l in self.dirt['location']]),
+                'fire': dict(self.fire, location=[list(l) for l in self.fire['location']])}
+
+    @classmethod
+    def from_dict(cls, d):
+        '''Return the snapshot written out by to_dict().'''
+        import vacuum  # vacuum imports this module, so the environment classes are looked up when loading
+        snapshot = cls(getattr(vacuum, d['env_class']), d['width'], d['height'], t=d['t'], config=d['config'],
+                       batch=d['batch'])
+        snapshot.template = [None] * d['size']
+        static_classes = {c.__name__: c for c in STATIC_CLASSES}
+        for (i, name, location) in zip(d['static']['order'], d['static']['class'], d['static']['location']):
+            obj = new_static(static_classes[name], tuple(location))
+            snapshot.static_index.add(obj, seq=i)
+            snapshot.template[i] = obj
+        snapshot.dirt = dict(d['dirt'], location=[tuple(l) for l in d['dirt']['location']])
+        snapshot.fire = dict(d['fire'], location=[tuple(l) for l in d['fire']['location']])
+        return snapshot
+
+    def save(self, filename):
+        with open(filename, 'w') as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, filename):
+        with open(filename, 'r') as f:
+            return cls.from_dict(json.load(f))
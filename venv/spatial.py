@@ -0,0 +1,199 @@
+'''
+This file holds the spatial index used by the XYEnvironment to look up objects by location.
+
+'''
+
+from utils import distance
+
+
+class SpatialIndex():
+    '''
+    A SpatialIndex keeps every object in an environment filed under its current location, so that lookups by cell do
+    not have to scan the whole object list.  Two levels are maintained:
+        cells:   location -> objects exactly at that location.  The location may be an (x, y) tuple or, for objects
+                 being held, the Agent that holds them.
+        buckets: (bx, by) -> objects with a tuple location inside that square block of bucket_size x bucket_size
+                 cells.  These answer radius queries by only visiting the blocks that overlap the query circle.
+    Every object is given a sequence number when it is added, and query results are returned in that order so that
+    they match the order of the environment's .objects list.
+
+    Consumers that need to know what changed between two points in time, such as a TraceRecorder, open a journal on
+    the index: a dict that is given every object added, removed or moved, until the consumer takes it.  A journal can
+    be opened with a limit, past which it is dropped (truncated) rather than grown, and take_journal() returns None:
+    the consumer then has to look at every object again, which is cheaper than going through that many changes.
+
+    An index can be layered over a base index holding objects that never change, such as the walls of a scenario, so
+    that many indexes can share them without copying.  The base is never changed through the layer: the first change
+    to one of its objects copies the whole base into the layer, after which the layer stands alone.
+    '''
+
+    def __init__(self, bucket_size=8, base=None):
+        self.bucket_size = bucket_size
+        self.cells = {}
+        self.buckets = {}
+        self.location_of = {}   # the location each object is currently filed under
+        self.seq = {}           # insertion order of each object
+        self.next_seq = 0
+        self.version = 0        # bumped on every change, so that copies of the index can tell they are stale
+        self.journals = {}      # consumer -> dict of the objects added, removed or moved, None once truncated
+        self.journal_limits = {}  # consumer -> most objects its journal may hold, or None
+        self.base = base        # index of unchanging objects shared with other indexes, or None
+
+    def __contains__(self, obj):
+        return obj in self.location_of or (self.base is not None and obj in self.base.location_of)
+
+    def __len__(self):
+        return len(self.location_of) + (len(self.base) if self.base is not None else 0)
+
+    def seq_of(self, obj):
+        seq = self.seq.get(obj)
+        return self.base.seq[obj] if seq is None else seq
+
+    def bucket_of(self, location):
+        return (int(location[0] // self.bucket_size), int(location[1] // self.bucket_size))
+
+    def add(self, obj, seq=None):
+        '''File a new object under its current location.  seq places it at a given position in the insertion order.'''
+        self._own(obj)
+        if obj in self.location_of:
+            self._discard(obj)
+        if seq is None:
+            seq = self.next_seq
+        self.next_seq = max(self.next_seq, seq + 1)
+        self.seq[obj] = seq
+        self._insert(obj, obj.location)
+        self.version += 1
+        if self.journals:
+            self._note(obj)
+
+    def add_all(self, objs, seqs):
+        '''File several new objects under their current locations, at the given positions in the insertion order.'''
+        (cells, buckets, size) = (self.cells, self.buckets, self.bucket_size)
+        for (obj, seq) in zip(objs, seqs):
+            location = obj.location
+            self.seq[obj] = seq
+            self.location_of[obj] = location
+            cells.setdefault(location, {})[obj] = None
+            if isinstance(location, tuple):
+                buckets.setdefault((int(location[0] // size), int(location[1] // size)), {})[obj] = None
+            if self.journals:
+                self._note(obj)
+        if seqs:
+            self.next_seq = max(self.next_seq, max(seqs) + 1)
+        self.version += 1
+
+    def remove(self, obj):
+        '''Remove an object from the index entirely.'''
+        self._own(obj)
+        self._discard(obj)
+        del self.seq[obj]
+        self.version += 1
+        if self.journals:
+            self._note(obj)
+
+    def move(self, obj, location):
+        '''Set obj.location and refile the object under its new location.'''
+        self._own(obj)
+        if obj in self.location_of:
+            self._discard(obj)
+            obj.location = location
+            self._insert(obj, location)
+            self.version += 1
+            if self.journals:
+                self._note(obj)
+        else:
+            obj.location = location
+
+    def open_journal(self, consumer, limit=None):
+        '''Start journaling the objects that change for consumer, holding at most limit of them.'''
+        self.journals[consumer] = {}
+        self.journal_limits[consumer] = limit
+
+    def take_journal(self, consumer):
+        '''Return the objects added, removed or moved since consumer opened or last took its journal, as a dict, and
+        start a new one.  Returns None if the journal was truncated or was never opened on this index.'''
+        if consumer not in self.journals:
+            return None
+        journal = self.journals[consumer]
+        self.journals[consumer] = {}
+        return journal
+
+    def close_journal(self, consumer):
+        self.journals.pop(consumer, None)
+        self.journal_limits.pop(consumer, None)
+
+    def copy(self):
+        '''Return an index holding the same objects, which can then be changed without affecting this one.'''
+        index = SpatialIndex(self.bucket_size, base=self.base)
+        index.cells = {location: cell.copy() for (location, cell) in self.cells.items()}
+        index.buckets = {key: bucket.copy() for (key, bucket) in self.buckets.items()}
+        index.location_of = self.location_of.copy()
+        index.seq = self.seq.copy()
+        index.next_seq = self.next_seq
+        return index
+
+    def at(self, location):
+        '''Return all objects exactly at a given location, in insertion order.'''
+        cell = self.cells.get(location)
+        if self.base is not None:
+            shared = self.base.cells.get(location)
+            if shared:
+                if not cell:
+                    return self.base.at(location)
+                return sorted(list(cell) + list(shared), key=self.seq_of)
+        if not cell:
+            return []
+        if len(cell) == 1:
+            return list(cell)
+        return sorted(cell, key=self.seq.__getitem__)
+
+    def near(self, location, radius):
+        '''Return all objects with a tuple location within radius of location, in insertion order.'''
+        (x, y) = location
+        (bx_min, by_min) = self.bucket_of((x - radius, y - radius))
+        (bx_max, by_max) = self.bucket_of((x + radius, y + radius))
+        layers = [self.buckets] if self.base is None else [self.buckets, self.base.buckets]
+        found = []
+        for buckets in layers:
+            for bx in range(bx_min, bx_max + 1):
+                for by in range(by_min, by_max + 1):
+                    bucket = buckets.get((bx, by))
+                    if bucket:
+                        found.extend(o for o in bucket if distance(location, o.location) <= radius)
+        found.sort(key=self.seq.__getitem__ if self.base is None else self.seq_of)
+        return found
+
+    def _note(self, obj):
+        for (consumer, journal) in self.journals.items():
+            if journal is not None:
+                journal[obj] = None
+                limit = self.journal_limits[consumer]
+                if limit is not None and len(journal) > limit:
+                    self.journals[consumer] = None
+
+    def _own(self, obj):
+        '''Copy the base into this index before one of its objects is changed.'''
+        if self.base is not None and obj in self.base.location_of:
+            (base, self.base) = (self.base, None)
+            for (o, location) in base.location_of.items():
+                self.seq[o] = base.seq[o]
+                self._insert(o, location)
+
+    def _insert(self, obj, location):
+        self.location_of[obj] = location
+        self.cells.setdefault(location, {})[obj] = None
+        if isinstance(location, tuple):
+            self.buckets.setdefault(self.bucket_of(location), {})[obj] = None
+
+    def _discard(self, obj):
+        location = self.location_of.pop(obj)
+        cell = self.cells[location]
+        del cell[obj]
+        if not cell:
+            del self.cells[location]
+        if isinstance(location, tuple):
+            key = self.bucket_of(location)
+            bucket = self.buckets[key]
+            del bucket[obj]
+            if not bucket:
+                del self.buckets[key]
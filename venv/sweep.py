@@ -0,0 +1,360 @@
+'''
+This file holds the parameter sweep engine used by test11() in vacuum.py and by vacuum_cl.py.
+
+A sweep is every (sensor radius, number of drones, replicate) run for a fixed environment and team size.  Each run
+gets its own seed derived from the sweep seed, so runs are independent of each other and can be farmed out to a pool
+of processes, split across machines with shard/num_shards, and restarted after being killed.  Every finished run is
+appended as one JSON line to a checkpoint file; the first line of the file records the sweep parameters.
+
+An adaptive sweep (see adaptive_params) runs the replicates of every (sensor radius, number of drones) cell in rounds
+and stops giving a cell replicates once its completion time is known well enough, or once it is clearly worse than the
+best team for its sensor radius.  runs_to_average is then the most replicates a cell can get.  Its replicates have the
+same seeds as those of the full sweep, so an adaptive sweep runs a subset of the runs of the full sweep.
+'''
+
+import json
+import os
+import pickle
+import random
+import concurrent.futures
+from tqdm import tqdm
+
+import vacuum
+from vacuum import NewVacuumEnvironment, NewGreedyAgentWithoutRangePerception, NewGreedyDrone
+from snapshot import EnvSnapshot
+from tracing import TraceRecorder
+from utils import confidence_interval
+
+# (config, width, height) -> EnvSnapshot of the environment, for configs whose layout doesn't depend on the seed
+_templates = {}
+
+
+def sweep_params(sensor_radius_min, sensor_radius_max, environment_width=50, environment_height=50, team_size=40,
+                 runs_to_average=100, max_steps=3000, config='random dirt', seed=None):
+    '''Return the dictionary describing a sweep.  It is stored as the header line of the checkpoint file.'''
+    return {'sensor_radius_min': sensor_radius_min, 'sensor_radius_max': sensor_radius_max,
+            'environment_width': environment_width, 'environment_height': environment_height,
+            'team_size': team_size, 'runs_to_average': runs_to_average, 'max_steps': max_steps,
+            'config': config, 'seed': seed}
+
+
+def adaptive_params(params, round_size=10, half_width=25, confidence=0.95, prune=True):
+    '''
+    Return params for an adaptive sweep.  Each round gives every cell that is still running round_size more
+    replicates, after which a cell stops when
+        censored:    every replicate ran for max_steps without finishing, so all that is known is that its completion
+                     time is at least max_steps (its interval has zero width, but that doesn't make it settled),
+        converged:   the half width of the confidence interval of its mean completion time is at most half_width steps,
+        dominated:   with prune, the lower bound of its interval is above the upper bound of the interval of another
+                     cell with the same sensor radius, so it can't be the best team for that radius,
+        max runs:    it has had runs_to_average replicates.
+    '''
+    if round_size < 2 or params['runs_to_average'] < 2:
+        raise ValueError('A confidence interval needs at least 2 replicates, got round_size=%s and runs_to_average=%s'
+                         % (round_size, params['runs_to_average']))
+    return dict(params, adaptive={'round_size': round_size, 'half_width': half_width, 'confidence': confidence,
+                                  'prune': prune})
+
+
+def derive_seed(seed, sensor_radius, num_drones, replicate):
+    '''Return the seed for one run.  Seeding random with a string hashes it with sha512, so this does not depend on
+    the process or on PYTHONHASHSEED.'''
+    return random.Random('%s-%s-%s-%s' % (seed, sensor_radius, num_drones, replicate)).getrandbits(32)
+
+
+def sweep_tasks(params):
+    '''Return every (sensor_radius, num_drones, replicate) run in the sweep, in test11 order.'''
+    return [(sensor_radius, num_drones, replicate)
+            for sensor_radius in range(params['sensor_radius_min'], params['sensor_radius_max'] + 1)
+            for num_drones in range(0, params['team_size'])
+            for replicate in range(params['runs_to_average'])]
+
+
+def sweep_cells(params):
+    '''Return every (sensor_radius, num_drones) cell in the sweep, in test11 order.'''
+    return [(sensor_radius, num_drones)
+            for sensor_radius in range(params['sensor_radius_min'], params['sensor_radius_max'] + 1)
+            for num_drones in range(0, params['team_size'])]
+
+
+def adaptive_cells(params, records):
+    '''
+    Replay the rounds of an adaptive sweep over the records run so far and return (cells, tasks).  cells maps each
+    (sensor_radius, num_drones) cell to a dictionary holding
+        runs:                the number of replicates its interval is taken over
+        mean, lower, upper:  the mean completion time and its confidence interval, None before the first round
+        censored:            how many of those replicates ran for max_steps without finishing.  Their completion time
+                             is taken as max_steps, so the mean and interval of a cell with some are too low.
+        status:              'censored', 'converged', 'dominated' or 'max runs' (see adaptive_params), or None while it
+                             is running
+    tasks are the runs still needed to finish the current round, and are empty once every cell has stopped.  A cell's
+    interval only takes in the replicates of the rounds it ran, so the result doesn't depend on the order the runs
+    finished in, and a resumed sweep makes the same decisions as one that ran straight through.
+    '''
+    adaptive = params['adaptive']
+    times = {cell: {} for cell in sweep_cells(params)}
+    for r in records:
+        times[(r['sensor_radius'], r['num_drones'])][r['replicate']] = r['completion_time']
+    cells = {cell: {'runs': 0, 'mean': None, 'lower': None, 'upper': None, 'censored': 0, 'status': None}
+             for cell in times}
+
+    runs = 0
+    running = list(cells)
+    while running:
+        runs = min(runs + adaptive['round_size'], params['runs_to_average'])
+        tasks = [(sensor_radius, num_drones, replicate) for (sensor_radius, num_drones) in running
+                 for replicate in range(runs) if replicate not in times[(sensor_radius, num_drones)]]
+        if tasks:
+            return cells, tasks
+
+        for cell in running:
+            completion_times = [times[cell][replicate] for replicate in range(runs)]
+            (m, lower, upper) = confidence_interval(completion_times, adaptive['confidence'])
+            censored = completion_times.count(params['max_steps'])
+            cells[cell].update(runs=runs, mean=float(m), lower=float(lower), upper=float(upper), censored=censored)
+            if censored == runs:
+                cells[cell]['status'] = 'censored'
+            elif upper - m <= adaptive['half_width']:
+                cells[cell]['status'] = 'converged'
+            elif runs >= params['runs_to_average']:
+                cells[cell]['status'] = 'max runs'
+        if adaptive['prune']:
+            best = {}
+            for ((sensor_radius, num_drones), cell) in cells.items():
+                best[sensor_radius] = min(best.get(sensor_radius, cell['upper']), cell['upper'])
+            for cell in running:
+                if cells[cell]['status'] is None and cells[cell]['lower'] > best[cell[0]]:
+                    cells[cell]['status'] = 'dominated'
+        running = [cell for cell in running if cells[cell]['status'] is None]
+    return cells, []
+
+
+def run_replicate(params, sensor_radius, num_drones, replicate, batch=False, trace_dir=None):
+    '''Build a fresh environment and team for one run, run it and return its checkpoint record.  batch only changes
+    how the environment is stepped, not the result, so it is not part of the sweep parameters.  With trace_dir the
+    run is recorded to a trace file there that EnvFrame can replay.'''
+    seed = derive_seed(params['seed'], sensor_radius, num_drones, replicate)
+    random.seed(seed)
+
+    width = params['environment_width']
+    height = params['environment_height']
+    team_size = params['team_size']
+    num_roomba = team_size - num_drones
+
+    env = new_environment(params, batch=batch)
+    for n in range(num_roomba):
+        env.add_object(NewGreedyAgentWithoutRangePerception(communication=True),
+                       location=(random.randrange(1, width - 2),
+                                 random.randrange(1, height - 2))).id = team_size + n + 1
+
+    for n in range(num_drones):
+        env.add_object(NewGreedyDrone(sensor_radius=sensor_radius, communication=True),
+                       location=(random.randrange(1, width - 2), random.randrange(1, height - 2))).id = n + 1
+
+    recorder = None
+    if trace_dir:
+        recorder = TraceRecorder(env, trace_filename(trace_dir, sensor_radius, num_drones, replicate))
+    env.run(params['max_steps'])
+    if recorder:
+        recorder.close()
+
+    return {'sensor_radius': sensor_radius, 'num_drones': num_drones, 'ratio_roomba': num_roomba / team_size,
+            'replicate': replicate, 'seed': seed, 'completion_time': env.t}
+
+
+def trace_filename(trace_dir, sensor_radius, num_drones, replicate):
+    return os.path.join(trace_dir, 'run_%s_%s_%s.trace.gz' % (sensor_radius, num_drones, replicate))
+
+
+def template_key(params):
+    return (params['config'], params['environment_width'], params['environment_height'])
+
+
+def new_environment(params, batch=False):
+    '''
+    Return a fresh environment for one run.  A config that is laid out without drawing any random numbers gives the
+    same environment for every run, so it is only built once per process and copied from a snapshot after that.
+    '''
+    key = template_key(params)
+    if key in _templates:
+        return _templates[key].spawn(batch=batch)
+    state = random.getstate()
+    env = NewVacuumEnvironment(width=params['environment_width'], height=params['environment_height'],
+                               config=params['config'], batch=batch)
+    if random.getstate() == state:
+        _templates[key] = env.snapshot()
+    return env
+
+
+def _load_template(key, template):
+    _templates[key] = EnvSnapshot.from_dict(template)
+
+
+def _run_task(params, task, batch=False, trace_dir=None):
+    return run_replicate(params, *task, batch=batch, trace_dir=trace_dir)
+
+
+def read_checkpoint(filename):
+    '''Return (params, records) from a checkpoint file.  A partly written last line, left behind when a sweep is
+    killed mid-write, is ignored.'''
+    params = None
+    records = []
+    with open(filename, 'r') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if 'sweep' in entry:
+                params = entry['sweep']
+            else:
+                records.append(entry)
+    return params, records
+
+
+def run_sweep(params, workers=1, checkpoint=None, resume=False, shard=0, num_shards=1, batch=False, trace_dir=None):
+    '''
+    Run every task of the sweep that belongs to this shard and return (params, records), including any records loaded
+    from the checkpoint when resuming.  A seed of None is taken from the checkpoint when resuming, otherwise a new one
+    is generated with vacuum.set_seed.
+        workers:     number of processes to run replicates in.  1 runs everything in this process.
+        checkpoint:  file that each finished run is appended to.
+        resume:      skip runs already in the checkpoint.  Without it an existing checkpoint is an error, so a
+                     finished sweep is never overwritten by accident.
+        shard:       index of this shard, 0 <= shard < num_shards.  Task i belongs to shard i % num_shards.
+        batch:       step the environments with the BatchEngine.
+        trace_dir:   directory to record a trace of every run to, see tracing.py.
+    The state of random is the same after the sweep as it was once the seed was set, however many workers ran it.
+    '''
+    if not 0 <= shard < num_shards:
+        raise ValueError('shard must be in the range [0, %s), got %s' % (num_shards, shard))
+    if 'adaptive' in params and num_shards > 1:
+        raise ValueError("An adaptive sweep can't be split into shards, as every round depends on the one before it")
+    if trace_dir:
+        os.makedirs(trace_dir, exist_ok=True)
+
+    old_params, records = None, []
+    if checkpoint and os.path.exists(checkpoint) and os.path.getsize(checkpoint) > 0:
+        if not resume:
+            raise FileExistsError('Checkpoint %s already exists, pass resume to continue it' % checkpoint)
+        old_params, records = read_checkpoint(checkpoint)
+        with open(checkpoint, 'rb+') as f:  # finish off a partly written last line so new records start cleanly
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':
+                f.write(b'\n')
+
+    if params['seed'] is None:
+        if old_params is not None:
+            params = dict(params, seed=old_params['seed'])
+        elif num_shards > 1:
+            raise ValueError('A seed is required to split a sweep into shards')
+        else:
+            params = dict(params, seed=new_sweep_seed())
+
+    if old_params is not None and old_params != params:
+        raise ValueError('Checkpoint %s was written by a different sweep: %s' % (checkpoint, old_params))
+    if checkpoint and old_params is None:
+        with open(checkpoint, 'a' if records else 'w') as f:
+            f.write(json.dumps({'sweep': params}) + '\n')
+
+    # the runs, and building the template in this process, draw from random; the caller gets its stream back after
+    random_state = random.getstate()
+    out = open(checkpoint, 'a') if checkpoint else None
+    executor = None
+    try:
+        def finish(record):
+            records.append(record)
+            if out:
+                out.write(json.dumps(record) + '\n')
+                out.flush()
+
+        if workers > 1:
+            # build the template here, if the config has one, and hand it to the workers in its JSON form
+            new_environment(params)
+            key = template_key(params)
+            (initializer, initargs) = (None, ())
+            if key in _templates:
+                (initializer, initargs) = (_load_template, (key, _templates[key].to_dict()))
+            executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=initializer,
+                                                              initargs=initargs)
+
+        def run_tasks(tasks, desc):
+            if executor is None:
+                for task in tqdm(tasks, desc=desc):
+                    finish(_run_task(params, task, batch, trace_dir))
+            else:
+                futures = [executor.submit(_run_task, params, task, batch, trace_dir) for task in tasks]
+                for future in tqdm(concurrent.futures.as_completed(futures), total=len(futures), desc=desc):
+                    finish(future.result())
+
+        if 'adaptive' in params:
+            (cells, tasks) = adaptive_cells(params, records)
+            while tasks:
+                run_tasks(tasks, 'Sweep runs, %s cells running' % len({task[:2] for task in tasks}))
+                (cells, tasks) = adaptive_cells(params, records)
+        else:
+            done = {(r['sensor_radius'], r['num_drones'], r['replicate']) for r in records}
+            run_tasks([task for (i, task) in enumerate(sweep_tasks(params))
+                       if i % num_shards == shard and task not in done], 'Sweep runs')
+    finally:
+        if executor:
+            executor.shutdown()
+        if out:
+            out.close()
+        random.setstate(random_state)
+
+    return params, records
+
+
+def merge_checkpoints(filenames):
+    '''Return (params, records) from the checkpoints of several shards of one sweep, dropping duplicate runs.'''
+    params = None
+    merged = {}
+    for filename in filenames:
+        p, records = read_checkpoint(filename)
+        if params is None:
+            params = p
+        elif p is not None and p != params:
+            raise ValueError('Checkpoint %s was written by a different sweep: %s' % (filename, p))
+        for r in records:
+            merged[(r['sensor_radius'], r['num_drones'], r['replicate'])] = r
+    return params, [merged[k] for k in sorted(merged)]
+
+
+def records_to_data(params, records):
+    '''
+    Collect records into the test11 result list.  Every tuple is structured as follows:
+    (sensor radius [int], ratio of roomba [double], completion times [list])
+    '''
+    cells = {}
+    for r in sorted(records, key=lambda r: (r['sensor_radius'], r['num_drones'], r['replicate'])):
+        cells.setdefault((r['sensor_radius'], r['num_drones']), []).append(r['completion_time'])
+    return [(sensor_radius, (params['team_size'] - num_drones) / params['team_size'], completion_times)
+            for ((sensor_radius, num_drones), completion_times) in sorted(cells.items())]
+
+
+def save_data(params, data):
+    '''Pickle the test11 result list, one file per sensor radius holding every radius up to it (as test11 does).'''
+    for sensor_radius in sorted({d[0] for d in data}):
+        pickle.dump([d for d in data if d[0] <= sensor_radius],
+                    open("test11_%s_%s_%s_%s_%s_iter%s.p" % (params['environment_width'], params['environment_height'],
+                                                            params['team_size'], params['runs_to_average'],
+                                                            params['max_steps'], sensor_radius), "wb"))
+
+
+def save_cells(params, cells):
+    '''Write the per cell run counts, intervals, censored runs and stopping reasons of an adaptive sweep to a JSON
+    file, one entry per cell in test11 order.'''
+    entries = [dict(cell, sensor_radius=sensor_radius, num_drones=num_drones,
+                    ratio_roomba=(params['team_size'] - num_drones) / params['team_size'])
+               for ((sensor_radius, num_drones), cell) in sorted(cells.items())]
+    with open("test11_%s_%s_%s_%s_%s_iter%s_cells.json" % (params['environment_width'], params['environment_height'],
+                                                          params['team_size'], params['runs_to_average'],
+                                                          params['max_steps'], params['sensor_radius_max']), "w") as f:
+        json.dump({'sweep': params, 'cells': entries}, f, indent=1)
+
+
+def new_sweep_seed(seed=None):
+    '''Set the sweep seed through vacuum.set_seed so a random seed is generated (and printed) when seed is None.'''
+    vacuum.set_seed(seed)
+    return vacuum.current_seed
@@ -0,0 +1,222 @@
+'''
+This file holds the event trace recorder for headless runs and the replay that EnvFrame plays traces back with.
+
+A trace is a JSON lines file, gzipped if the filename ends in .gz.  The first line is a header holding the size of
+the environment and the events that add every object in it when recording started:
+    {"trace": 1, "width": w, "height": h, "t": t, "objects": [events...]}
+Objects are given integer keys in the order they are first seen.  After the header there is one line for each tick in
+which something changed, holding the tick followed by its events, flattened:
+    [t, "m", key, x, y, "t", key, dx, dy, ...]
+        "a", key, name, id      an object was added
+        "d", key                an object was removed
+        "m", key, x, y          an object is now at (x, y)
+        "h", key, holder        an object is now held by the agent holder
+        "t", key, dx, dy        an agent now has the heading (dx, dy)
+Only the final state of an object in a tick is written, so the size of a trace grows with the activity in the run
+rather than with the number of objects.  The last line is {"end": t}; a trace cut short by a killed run can still be
+replayed up to its last complete line.
+'''
+
+import gzip
+import json
+
+from objects import Object
+
+
+def open_trace(filename, mode):
+    if filename.endswith('.gz'):
+        return gzip.open(filename, mode + 't')
+    return open(filename, mode)
+
+
+class TraceRecorder():
+    '''
+    Record the changes to env, an XYEnvironment, to filename as it runs.  Creating the recorder writes the header and
+    sets env.recorder, after which Environment.step records each tick.  Changes made between steps, such as adding the
+    agents, are recorded at the tick they were made in, so there can be two lines for one tick.  The spatial index
+    journals the objects that were added, removed or moved, so that only those and the agents' headings have to be
+    looked at each tick.
+    '''
+    def __init__(self, env, filename):
+        self.env = env
+        self.file = open_trace(filename, 'w')
+        self.keys = {}      # object -> key
+        self.state = {}     # object -> (location, heading) last written
+        env.index.open_journal(self)
+        env.recorder = self
+
+        objects = []
+        for obj in sorted(env.objects, key=lambda o: not isinstance(o.location, tuple)):  # holders before held objects
+            objects += self.changes(obj)
+        self.write({'trace': 1, 'width': env.width, 'height': env.height, 't': env.t, 'objects': objects})
+        env.index.take_journal(self)
+
+    def key_of(self, obj):
+        if obj not in self.keys:
+            self.keys[obj] = len(self.keys)
+        return self.keys[obj]
+
+    def changes(self, obj):
+        '''Return the events that bring the written state of obj in line with its current state.'''
+        if obj not in self.env.index:
+            if obj in self.state:
+                del self.state[obj]
+                return ['d', self.keys[obj]]
+            return []
+        key = self.key_of(obj)
+        (location, heading) = self.state.get(obj, (None, None))
+        events = []
+        if obj not in self.state:
+            events += ['a', key, getattr(obj, '__name__', obj.__class__.__name__), getattr(obj, 'id', '')]
+        if obj.location != location:
+            if isinstance(obj.location, tuple):
+                events += ['m', key, obj.location[0], obj.location[1]]
+            else:
+                events += ['h', key, self.key_of(obj.location)]
+        if getattr(obj, 'heading', None) != heading:
+            events += ['t', key, obj.heading[0], obj.heading[1]]
+        self.state[obj] = (obj.location, getattr(obj, 'heading', None))
+        return events
+
+    def record(self):
+        '''Write the events of the tick that just ran.'''
+        touched = self.env.index.take_journal(self)
+        for agent in self.env.agents:
+            if self.state.get(agent, (None, None))[1] != agent.heading:
+                touched[agent] = None
+        events = [self.env.t]
+        for obj in touched:
+            events += self.changes(obj)
+        if len(events) > 1:
+            self.write(events)
+
+    def write(self, line):
+        self.file.write(json.dumps(line, separators=(',', ':')) + '\n')
+
+    def close(self):
+        '''Write the end of the trace and close the file.'''
+        self.record()
+        self.write({'end': self.env.t})
+        self.file.close()
+        self.env.index.close_journal(self)
+        self.env.recorder = None
+
+
+class TracedObject(Object):
+    '''The stand-in for an object of a trace.  Only agents get a heading.'''
+    def __init__(self, name, id=''):
+        Object.__init__(self, id=id)
+        self.__name__ = name
+        self.location = None
+
+
+class TraceReplay():
+    '''
+    Play back a trace written by TraceRecorder.  A TraceReplay has the width, height, t, objects, step() and is_done()
+    of an environment, so that EnvFrame can display it, and step() and seek() return the objects that changed so that
+    only those have to be redrawn.  Objects that are not present at the current tick have a location of None.
+
+    Opening a trace reads and parses the whole file, but doesn't replay it.  The state is kept every keyframe_every
+    ticks the first time the replay passes them, so seeking back, or to a tick already passed, only replays the ticks
+    after the closest earlier keyframe.  Seeking past the furthest tick reached so far replays every tick up to it.
+    '''
+    def __init__(self, filename, keyframe_every=100):
+        self.ticks = {}
+        self.end = None
+        with open_trace(filename, 'r') as f:
+            header = json.loads(f.readline())
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(entry, dict):
+                    self.end = entry['end']
+                else:
+                    self.ticks.setdefault(entry[0], []).extend(entry[1:])
+        self.width = header['width']
+        self.height = header['height']
+        self.start = header['t']
+        if self.end is None:
+            self.end = max(self.ticks, default=self.start)
+
+        self.by_key = {}
+        self.t = self.start
+        self.apply(header['objects'])
+        self.apply(self.ticks.get(self.start, []))
+
+        # seek() rebuilds the state from the closest keyframe at or before the tick it is asked for
+        self.keyframe_every = keyframe_every
+        self.keyframes = {self.start: self.keyframe()}
+
+    @property
+    def objects(self):
+        '''The objects on the grid at the current tick.'''
+        return [obj for obj in self.by_key.values() if isinstance(obj.location, tuple)]
+
+    def find_at(self, cls, loc):
+        return [obj for obj in self.objects if obj.location == loc and isinstance(obj, cls)]
+
+    def is_done(self):
+        return self.t >= self.end
+
+    def step(self):
+        '''Advance one tick and return the objects that changed.'''
+        if self.is_done():
+            return []
+        self.t += 1
+        changed = self.apply(self.ticks.get(self.t, []))
+        if (self.t - self.start) % self.keyframe_every == 0 and self.t not in self.keyframes:
+            self.keyframes[self.t] = self.keyframe()
+        return changed
+
+    def seek(self, t):
+        '''Jump to tick t and return the objects that changed.'''
+        t = min(max(t, self.start), self.end)
+        if t == self.t:
+            return []
+        before = self.keyframe()
+        k = max(k for k in self.keyframes if k <= t)
+        if t < self.t or k > self.t:
+            self.restore(self.keyframes[k])
+            self.t = k
+        while self.t < t:
+            self.step()
+        after = self.keyframe()
+        return [self.by_key[key] for key in set(before) | set(after) if before.get(key) != after.get(key)]
+
+    def apply(self, events):
+        changed = {}
+        i = 0
+        while i < len(events):
+            op = events[i]
+            obj = self.by_key.get(events[i + 1])
+            if op == 'a':
+                if obj is None:
+                    obj = self.by_key[events[i + 1]] = TracedObject(events[i + 2], events[i + 3])
+                i += 4
+            elif op == 'd':
+                obj.location = None
+                i += 2
+            elif op == 'm':
+                obj.location = (events[i + 2], events[i + 3])
+                i += 4
+            elif op == 'h':
+                obj.location = self.by_key[events[i + 2]]
+                i += 3
+            elif op == 't':
+                obj.heading = (events[i + 2], events[i + 3])
+                i += 4
+            else:
+                raise ValueError('Unknown trace event %s' % op)
+            changed[obj] = None
+        return list(changed)
+
+    def keyframe(self):
+        return {key: (obj.location, getattr(obj, 'heading', None)) for (key, obj) in self.by_key.items()}
+
+    def restore(self, keyframe):
+        for (key, obj) in self.by_key.items():
+            (obj.location, heading) = keyframe.get(key, (None, None))
+            if heading is not None:
+                obj.heading = heading
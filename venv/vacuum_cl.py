@@ -0,0 +1,58 @@
+'''
+A command line script to allow running instances of test11() from vacuum.py
+
+A long sweep can be split across machines, e.g. with two machines:
+    python vacuum_cl.py 9 15 --seed 7 --workers 16 --checkpoint a.jsonl --shard 0 --num-shards 2
+    python vacuum_cl.py 9 15 --seed 7 --workers 16 --checkpoint b.jsonl --shard 1 --num-shards 2
+and the checkpoints merged into the usual test11 pickles afterwards:
+    python vacuum_cl.py --merge a.jsonl b.jsonl
+A killed run is picked up again by repeating its command with --resume.
+
+With --adaptive each team mix only gets replicates until its average completion time is settled:
+    python vacuum_cl.py 9 15 --seed 7 --workers 16 --checkpoint a.jsonl --adaptive --half-width 25
+'''
+
+import argparse
+from vacuum import test11
+import sweep
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("sensor_radius_min", type=int, nargs='?',
+                        help="Minimum drone sensor radius that should be considered")
+    parser.add_argument("sensor_radius_max", type=int, nargs='?',
+                        help="Maximum drone sensor radius that should be considered")
+    parser.add_argument("--seed", type=int, default=None, help="Sweep seed that every run's seed is derived from")
+    parser.add_argument("--workers", type=int, default=1, help="Number of processes to run replicates in")
+    parser.add_argument("--checkpoint", default=None, help="File that each finished run is appended to")
+    parser.add_argument("--resume", action='store_true', help="Skip the runs already in the checkpoint")
+    parser.add_argument("--shard", type=int, default=0, help="Index of the shard of the sweep to run")
+    parser.add_argument("--num-shards", type=int, default=1, help="Number of shards the sweep is split into")
+    parser.add_argument("--batch", action='store_true', help="Step the environments with the batched NumPy engine")
+    parser.add_argument("--trace-dir", default=None, help="Directory to record a replayable trace of every run to")
+    parser.add_argument("--adaptive", action='store_true',
+                        help="Stop giving a team mix replicates once its average completion time is settled")
+    parser.add_argument("--half-width", type=float, default=25,
+                        help="Confidence interval half width, in steps, that an adaptive sweep stops a team mix at")
+    parser.add_argument("--merge", nargs='+', metavar='CHECKPOINT',
+                        help="Merge shard checkpoints into test11 pickles instead of running")
+    args = parser.parse_args()
+
+    if args.merge:
+        params, records = sweep.merge_checkpoints(args.merge)
+        sweep.save_data(params, sweep.records_to_data(params, records))
+        return
+
+    if args.sensor_radius_min is None or args.sensor_radius_max is None:
+        parser.error("sensor_radius_min and sensor_radius_max are required unless --merge is given")
+    if args.num_shards > 1 and not args.checkpoint:
+        parser.error("--checkpoint is required when the sweep is split into shards")
+    if args.num_shards > 1 and args.adaptive:
+        parser.error("--adaptive sweeps can't be split into shards")
+
+    test11(args.sensor_radius_min, args.sensor_radius_max, seed=args.seed, showPlot=False, workers=args.workers,
+           checkpoint=args.checkpoint, resume=args.resume, shard=args.shard, num_shards=args.num_shards,
+           batch=args.batch, trace_dir=args.trace_dir, adaptive=args.adaptive, half_width=args.half_width)
+
+if __name__ == "__main__":
+    main()